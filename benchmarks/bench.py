@@ -0,0 +1,233 @@
+"""Microbenchmarks لمسارات البوت الساخنة.
+
+يقيس time_left_str و parse_end_datetime وبناء نصوص الأقسام والأحداث،
+ودورة تنبيهات كاملة (بناء الجدول + وضع التنبيهات في الصندوق + التوصيل
+إلى Bot وهمي) على جدول content بعدد صفوف اصطناعية 10 و 1k و 100k.
+
+الاستخدام:
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --sizes 10,1000 --compare results.json
+
+النتائج تُطبع بصيغة JSON حتى يمكن مقارنة التشغيلات ببعضها.
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_bench_app(workdir: str):
+    # create_app يقرأ متغيرات البيئة وينشئ genshin_bot.db في المجلد الحالي
+    os.environ.setdefault("BOT_TOKEN", "123456:benchmark")
+    os.environ.setdefault("OWNER_ID", "1")
+    os.environ.setdefault("TARGET_CHAT_ID", "-1001")
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    from genshin_bot import create_app
+    return create_app()
+
+
+def measure(func, iterations: int, repeat: int = 5) -> list:
+    """يرجع زمن العملية الواحدة (ثوانٍ) لكل تكرار."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations)
+    return samples
+
+
+async def measure_async(func, iterations: int, repeat: int = 5) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await func()
+        samples.append((time.perf_counter() - started) / iterations)
+    return samples
+
+
+def result(name: str, samples: list, iterations: int, **params) -> dict:
+    median = statistics.median(samples)
+    return {
+        "name": name,
+        "params": params,
+        "iterations": iterations,
+        "repeat": len(samples),
+        "mean_s": statistics.fmean(samples),
+        "median_s": median,
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "ops_per_s": 1 / median if median else None,
+    }
+
+
+def populate(app, rows: int, now_ts: int, seed: int = 1):
+    """يملأ content و content_deadlines بصفوف اصطناعية (مع نسبة صغيرة مستحقة الآن)."""
+    from genshin_bot.formatting import arabic_section_titles
+
+    rng = random.Random(seed)
+    game = app.config.game
+    sections = list(arabic_section_titles) + ['events']
+    regions = [server for server, _, _ in app.db.run_sync(
+        lambda conn: conn.execute("SELECT server, offset_hours, label FROM server_offsets WHERE game = ?", (game,)).fetchall()
+    )]
+
+    def insert(conn):
+        for table in ("content", "content_deadlines", "sent_alerts", "alert_outbox"):
+            conn.execute(f"DELETE FROM {table}")
+        for i in range(rows):
+            section = sections[i % len(sections)]
+            content_id = conn.execute(
+                "INSERT INTO content (game, section, title, name, image_file_id) VALUES (?, ?, ?, ?, ?)",
+                (game, section, f"{section} {i}", f"name {i}", f"file-{i}")
+            ).lastrowid
+            # للحدث موعد واحد بتوقيت أول سيرفر
+            conn.executemany(
+                "INSERT INTO content_deadlines (content_id, game, region, deadline) VALUES (?, ?, ?, ?)",
+                [(content_id, game, region, now_ts + rng.randint(-3600, 7 * 86400))
+                 for region in (regions[:1] if section == 'events' else regions)]
+            )
+
+    app.db.run_sync(insert)
+    app.invalidate_content()
+
+
+async def bench_alert_pass(app, rows: int) -> dict:
+    from genshin_bot.alerts import build_alert_schedule, deliver_outbox, enqueue_due_alerts
+
+    sent = []
+
+    async def stub_send_message(chat_id, text, **kwargs):
+        sent.append(chat_id)
+
+    app.bot.send_message = stub_send_message
+    # لا نريد انتظار حدود Telegram الحقيقية داخل القياس
+    app.send_limiter.acquire = lambda chat_id: asyncio.sleep(0)
+
+    now_ts = int(time.time())
+    populate(app, rows, now_ts)
+
+    started = time.perf_counter()
+    heap = await build_alert_schedule(app, now_ts)
+    scheduled = time.perf_counter()
+
+    due = []
+    while heap and heap[0][0] <= now_ts:
+        due.append(heapq.heappop(heap))
+    await enqueue_due_alerts(app, due, now_ts)
+    enqueued = time.perf_counter()
+
+    delivery = asyncio.create_task(deliver_outbox(app))
+    while (await app.db.fetchone("SELECT COUNT(*) FROM alert_outbox"))[0]:
+        await asyncio.sleep(0.001)
+    delivery.cancel()
+    finished = time.perf_counter()
+
+    return {
+        "name": "alert_pass",
+        "params": {"rows": rows},
+        "iterations": 1,
+        "repeat": 1,
+        "build_schedule_s": scheduled - started,
+        "enqueue_s": enqueued - scheduled,
+        "deliver_s": finished - enqueued,
+        "total_s": finished - started,
+        "scheduled_alerts": len(heap) + len(due),
+        "due_alerts": len(due),
+        "messages_sent": len(sent),
+    }
+
+
+async def run(sizes, iterations: int) -> list:
+    workdir = tempfile.mkdtemp(prefix="timebot-bench-")
+    app = create_bench_app(workdir)
+    from genshin_bot.formatting import parse_end_datetime, time_left_str
+    from genshin_bot.rendering import build_events_caption, build_section_caption
+
+    results = []
+
+    now_ts = int(time.time())
+    results.append(result(
+        "time_left_str", measure(lambda: time_left_str(now_ts + 987654, now_ts), iterations), iterations
+    ))
+    results.append(result(
+        "parse_end_datetime", measure(lambda: parse_end_datetime("2030-01-01 04:00:00", 8), iterations), iterations
+    ))
+
+    populate(app, 50, now_ts)
+    render_iterations = max(1, iterations // 10)
+    results.append(result(
+        "build_section_caption",
+        await measure_async(lambda: build_section_caption(app, 'banner', now_ts), render_iterations),
+        render_iterations
+    ))
+    results.append(result(
+        "build_events_caption",
+        await measure_async(lambda: build_events_caption(app, now_ts), render_iterations),
+        render_iterations, events=len((await app.cache.get('events'))[0])
+    ))
+
+    for rows in sizes:
+        results.append(await bench_alert_pass(app, rows))
+
+    app.db.close()
+    return results
+
+
+def compare(results: list, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["name"], json.dumps(r["params"], sort_keys=True)): r for r in json.load(f)["results"]}
+    for r in results:
+        old = baseline.get((r["name"], json.dumps(r["params"], sort_keys=True)))
+        if not old:
+            continue
+        metric = "median_s" if "median_s" in r else "total_s"
+        ratio = r[metric] / old[metric] if old[metric] else float("inf")
+        print(f"{r['name']:<24} {json.dumps(r['params']):<20} {old[metric]:.6g}s -> {r[metric]:.6g}s ({ratio:.2f}x)", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the time bot")
+    parser.add_argument("--sizes", default="10,1000,100000", help="comma separated content row counts for the alert pass")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--output", help="write JSON results to this file as well as stdout")
+    parser.add_argument("--compare", help="previous JSON results to compare against (printed to stderr)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    output_path = os.path.abspath(args.output) if args.output else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    # سجلات البوت (تنبيه لكل محتوى) تشوّه القياس
+    logging.disable(logging.WARNING)
+
+    results = asyncio.run(run(sizes, args.iterations))
+    report = {
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    if compare_path:
+        compare(results, compare_path)
+
+
+if __name__ == "__main__":
+    main()
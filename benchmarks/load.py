@@ -0,0 +1,291 @@
+"""اختبار حمل كامل للبوت بدون إنترنت.
+
+يشغّل خادم Bot API وهمياً على 127.0.0.1 (getMe و getUpdates و sendMessage
+و sendPhoto ...) ويوجّه إليه البوت عبر TELEGRAM_API_URL، ثم يغذّي dp الحقيقي
+بتحديثات مولّدة أو مسجلة ويقيس التحديثات/ثانية وزمن الرد (p50/p99) وعدد
+الاستدعاءات الصادرة لكل method.
+
+السيناريو المولّد: --chats مجموعة تطلب البنر/الاحداث --requests مرة لكل منها
+(كل مجموعة ترسل الطلب التالي بعد وصول الرد)، مع --admin-flows تدفق /setbanner
+كامل من المالك في نفس الوقت.
+
+الاستخدام:
+    python benchmarks/load.py --chats 300 --requests 5 --admin-flows 3
+    python benchmarks/load.py --replay updates.jsonl   # تحديث JSON في كل سطر
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+
+from aiohttp import web
+
+from bench import create_bench_app
+
+TOKEN = "123456:loadtest"
+OWNER_ID = 1
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class FakeBotAPI:
+    """خادم Bot API وهمي: يسلّم التحديثات من طابور ويسجل كل استدعاء صادر."""
+
+    def __init__(self):
+        self.updates = deque()
+        self.updates_ready = asyncio.Event()
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.calls = Counter()
+        # chat_id -> أوقات تسليم التحديثات التي لم يصلها رد بعد
+        self.pending = defaultdict(deque)
+        self.latencies = []
+        self.on_reply = None
+        self.delivered = 0
+        self.first_delivery = None
+        self.last_reply = None
+
+    def push(self, update: dict):
+        update.setdefault("update_id", next(self.update_ids))
+        self.updates.append(update)
+        self.updates_ready.set()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request):
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        self.calls[method] += 1
+        handler = getattr(self, f"api_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def api_getMe(self, params):
+        return {"id": 42, "is_bot": True, "first_name": "TimeBot", "username": "time_bot"}
+
+    async def api_getUpdates(self, params):
+        if not self.updates:
+            self.updates_ready.clear()
+            try:
+                await asyncio.wait_for(self.updates_ready.wait(), timeout=min(1, int(params.get("timeout", 0))))
+            except asyncio.TimeoutError:
+                return []
+        limit = int(params.get("limit", 100))
+        batch = [self.updates.popleft() for _ in range(min(limit, len(self.updates)))]
+        now = time.perf_counter()
+        if self.first_delivery is None:
+            self.first_delivery = now
+        for update in batch:
+            message = update.get("message")
+            if message:
+                self.pending[message["chat"]["id"]].append(now)
+        self.delivered += len(batch)
+        return batch
+
+    def reply(self, params, **extra):
+        chat_id = int(params["chat_id"])
+        now = time.perf_counter()
+        if self.pending[chat_id]:
+            self.latencies.append(now - self.pending[chat_id].popleft())
+        self.last_reply = now
+        message = {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group", "title": "chat"},
+            **extra,
+        }
+        if self.on_reply:
+            self.on_reply(chat_id)
+        return message
+
+    async def api_sendMessage(self, params):
+        return self.reply(params, text=params.get("text", ""))
+
+    async def api_sendPhoto(self, params):
+        photo = {"file_id": params.get("photo", "photo"), "file_unique_id": "u", "width": 1, "height": 1}
+        return self.reply(params, photo=[photo], caption=params.get("caption", ""))
+
+
+def make_update(chat_id: int, user_id: int, text: str = None, photo: str = None) -> dict:
+    message = {
+        "message_id": chat_id & 0xFFFF,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group", "title": "chat"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "user"},
+    }
+    if photo:
+        message["photo"] = [{"file_id": photo, "file_unique_id": photo, "width": 512, "height": 512}]
+    else:
+        message["text"] = text
+    return {"message": message}
+
+
+def generated_scripts(chats: int, requests: int, admin_flows: int) -> dict:
+    """chat_id -> قائمة تحديثات تُرسل واحداً بعد وصول رد السابق."""
+    scripts = {}
+    for i in range(chats):
+        chat_id = -1000000 - i
+        texts = ["البنر" if (i + n) % 2 else "الاحداث" for n in range(requests)]
+        scripts[chat_id] = [make_update(chat_id, 1000 + i, text) for text in texts]
+
+    flow = []
+    for n in range(admin_flows):
+        flow += [
+            make_update(OWNER_ID, OWNER_ID, "/setbanner"),
+            make_update(OWNER_ID, OWNER_ID, f"بنرات {n} ; شخصية {n}"),
+            make_update(OWNER_ID, OWNER_ID, "2030-01-01 04:00:00"),
+            make_update(OWNER_ID, OWNER_ID, "2030-01-01 04:00:00"),
+            make_update(OWNER_ID, OWNER_ID, "2030-01-01 04:00:00"),
+            make_update(OWNER_ID, OWNER_ID, photo=f"banner-{n}"),
+        ]
+    if flow:
+        scripts[OWNER_ID] = flow
+    return scripts
+
+
+def seed_content(app):
+    game = app.config.game
+
+    def insert(conn):
+        deadline = int(time.time()) + 30 * 86400
+        content_id = conn.execute(
+            "INSERT INTO content (game, section, title, name, image_file_id) VALUES (?, 'banner', ?, ?, ?)",
+            (game, "بنرات", "شخصية", "banner-0")
+        ).lastrowid
+        regions = conn.execute("SELECT server FROM server_offsets WHERE game = ?", (game,)).fetchall()
+        conn.executemany(
+            "INSERT INTO content_deadlines (content_id, game, region, deadline) VALUES (?, ?, ?, ?)",
+            [(content_id, game, region, deadline) for region, in regions]
+        )
+        for n in range(10):
+            event_id = conn.execute("INSERT INTO content (game, section, name) VALUES (?, 'events', ?)", (game, f"حدث {n}")).lastrowid
+            conn.execute(
+                "INSERT INTO content_deadlines (content_id, game, region, deadline) VALUES (?, ?, ?, ?)",
+                (event_id, game, regions[0][0], deadline + n * 3600)
+            )
+
+    app.db.run_sync(insert)
+
+
+async def run(args) -> dict:
+    api = FakeBotAPI()
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    os.environ["BOT_TOKEN"] = TOKEN
+    os.environ["OWNER_ID"] = str(OWNER_ID)
+    os.environ["TARGET_CHAT_ID"] = ""  # بدون مشتركين: لا تنبيهات أثناء القياس
+    os.environ["TELEGRAM_API_URL"] = f"http://127.0.0.1:{port}"
+    # نقيس سعة البوت نفسه؛ لاختبار حدود التكرار مرّر THROTTLE_*_LIMITS صراحة
+    os.environ.setdefault("THROTTLE_CHAT_LIMITS", "default=1000000/1")
+    os.environ.setdefault("THROTTLE_USER_LIMITS", "default=1000000/1")
+    app = create_bench_app(tempfile.mkdtemp(prefix="timebot-load-"))
+    seed_content(app)
+
+    done = asyncio.Event()
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            updates = [json.loads(line) for line in f if line.strip()]
+        expected = len(updates)
+        for update in updates:
+            update.pop("update_id", None)
+            api.push(update)
+        replies = Counter()
+
+        def on_reply(chat_id):
+            replies["total"] += 1
+            if replies["total"] >= expected:
+                done.set()
+    else:
+        scripts = {chat_id: deque(steps) for chat_id, steps in generated_scripts(args.chats, args.requests, args.admin_flows).items()}
+        expected = sum(len(steps) for steps in scripts.values())
+        remaining = [len(scripts)]
+        for steps in scripts.values():
+            api.push(steps.popleft())
+
+        def on_reply(chat_id):
+            steps = scripts.get(chat_id)
+            if steps:
+                api.push(steps.popleft())
+            elif steps is not None:
+                del scripts[chat_id]
+                remaining[0] -= 1
+                if not remaining[0]:
+                    done.set()
+
+    api.on_reply = on_reply
+    polling = asyncio.create_task(app.dp.start_polling(app.bot, handle_signals=False, polling_timeout=1))
+    timed_out = False
+    try:
+        await asyncio.wait_for(done.wait(), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+    await app.dp.stop_polling()
+    await polling
+    await runner.cleanup()
+    await app.close()
+
+    elapsed = (api.last_reply or time.perf_counter()) - (api.first_delivery or time.perf_counter())
+    return {
+        "timestamp": int(time.time()),
+        "scenario": {"replay": args.replay} if args.replay else {
+            "chats": args.chats, "requests": args.requests, "admin_flows": args.admin_flows,
+        },
+        "timed_out": timed_out,
+        "updates": api.delivered,
+        "expected_updates": expected,
+        "replies": len(api.latencies),
+        "unanswered": sum(len(times) for times in api.pending.values()),
+        "elapsed_s": elapsed,
+        "updates_per_s": api.delivered / elapsed if elapsed > 0 else None,
+        "latency_s": {
+            "p50": percentile(api.latencies, 0.50),
+            "p99": percentile(api.latencies, 0.99),
+            "max": max(api.latencies, default=None),
+        },
+        "api_calls": dict(api.calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against a fake Telegram Bot API server")
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=5, help="requests per chat (each waits for the previous reply)")
+    parser.add_argument("--admin-flows", type=int, default=3, help="complete /setbanner flows run by the owner")
+    parser.add_argument("--replay", help="JSON lines file of recorded updates, all fed at once")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="write JSON results to this file as well as stdout")
+    args = parser.parse_args()
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    logging.disable(logging.WARNING)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    sys.exit(1 if report["timed_out"] else 0)
+
+
+if __name__ == "__main__":
+    main()
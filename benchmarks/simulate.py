@@ -0,0 +1,199 @@
+"""محاكاة موسم كامل من التنبيهات بوقت افتراضي مسرّع.
+
+تشغّل check_and_send_alerts و deliver_outbox الحقيقيتين (مع قاعدة بيانات
+حقيقية في مجلد مؤقت) على VirtualClock و Bot وهمي، بينما ينشر "مشرف" وهمي
+محتوى اصطناعياً لكل السيرفرات على مدار الموسم (كل عنصر يُنشر قبل موعده
+بأيام كما في بداية كل تحديث). في النهاية تُقارن الرسائل المستلمة بالتنبيهات
+المتوقعة لكل مشترك:
+
+    missed     تنبيهات متوقعة لم تصل
+    late       وصلت بعد موعدها بأكثر من --tolerance ثانية افتراضية
+    duplicate  وصلت أكثر من مرة
+    unexpected وصلت ولم تكن متوقعة
+
+ويُحسب زمن المعالجة الحقيقي (wall و CPU) لكل يوم محاكى. حدود الإرسال في
+Telegram (send_limiter) لا تُحاكى.
+
+الاستخدام:
+    python benchmarks/simulate.py --days 42 --items 60 --subscribers 3
+    ALERT_THRESHOLDS=1d,1h python benchmarks/simulate.py --output season.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from bench import create_bench_app
+
+ALERT_PATTERN = re.compile(r"\*\*(?:تنبيه الإنتهاء \((.+?)\)|انتهى المحتوى):\*\*\n\*\*(.+?)\*\* - سيرفر \*\*(.+?)\*\*")
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def season_items(count: int, start: int, days: int, regions: list, rng: random.Random) -> list:
+    """[(publish_ts, title, [(server, deadline), ...]), ...] مرتبة حسب النشر."""
+    items = []
+    for i in range(count):
+        # الموعد بنفس الساعة المحلية في كل سيرفر (كما في اللعبة)، فيختلف بتوقيت UTC
+        local_end = start + rng.randint(3600, days * 86400)
+        publish_ts = max(start, local_end - rng.randint(2 * 86400, 21 * 86400))
+        deadlines = [(server, local_end - offset_hours * 3600) for server, offset_hours, _ in regions]
+        items.append((publish_ts, f"sim-{i:03d}", deadlines))
+    return sorted(items)
+
+
+def expected_alerts(items: list, thresholds: list) -> dict:
+    """(title, server, threshold) -> الموعد المتوقع للإرسال.
+
+    العتبات المستحقة أصلاً لحظة النشر يُرسل أصغرها فقط فور النشر (كما في build_alert_schedule).
+    """
+    expected = {}
+    for publish_ts, title, deadlines in items:
+        for server, deadline in deadlines:
+            overdue = None
+            for threshold in thresholds + [0]:
+                due_ts = deadline - threshold
+                if due_ts <= publish_ts:
+                    overdue = threshold
+                else:
+                    expected[(title, server, threshold)] = due_ts
+            if overdue is not None:
+                expected[(title, server, overdue)] = publish_ts
+    return expected
+
+
+async def run(args) -> dict:
+    # المشتركون يضيفهم السيناريو نفسه
+    os.environ["TARGET_CHAT_ID"] = ""
+    app = create_bench_app(tempfile.mkdtemp(prefix="ppp-sim-"))
+    from genshin_bot.alerts import check_and_send_alerts, deliver_outbox
+    from genshin_bot.clock import VirtualClock
+    from genshin_bot.content import save_section
+    from genshin_bot.formatting import duration_ar
+
+    start = int(time.time()) // 3600 * 3600
+    end = start + args.days * 86400
+    rng = random.Random(args.seed)
+    game = app.config.game
+    regions = app.db.run_sync(lambda conn: conn.execute(
+        "SELECT server, offset_hours, label FROM server_offsets WHERE game = ? ORDER BY position", (game,)
+    ).fetchall())
+    items = season_items(args.items, start, args.days, regions, rng)
+    thresholds = list(app.config.alert_thresholds)
+    expected = expected_alerts(items, thresholds)
+
+    subscribers = [-(1000 + i) for i in range(args.subscribers)]
+    await app.db.executemany(
+        "INSERT INTO subscriptions (chat_id, created_at) VALUES (?, ?)",
+        [(chat_id, start) for chat_id in subscribers]
+    )
+    app.cache.invalidate('subscriptions')
+
+    # ثلاث مهام تنام على الساعة: التنبيهات والتوصيل والمشرف الوهمي
+    clock = app.clock = VirtualClock(start, participants=3)
+    server_by_label = {label or server: server for server, _, label in regions}
+    threshold_by_text = {duration_ar(threshold): threshold for threshold in thresholds}
+    received = Counter()
+    lateness = []
+    unexpected = Counter()
+
+    async def send_message(chat_id, text, **kwargs):
+        for duration, title, label in ALERT_PATTERN.findall(text):
+            key = (title, server_by_label.get(label, label), threshold_by_text.get(duration, 0) if duration else 0)
+            received[(chat_id, *key)] += 1
+            if key not in expected:
+                unexpected[key] += 1
+            elif received[(chat_id, *key)] == 1:
+                lateness.append(clock.time() - expected[key])
+
+    async def no_limit(chat_id):
+        pass
+
+    app.bot.send_message = send_message
+    app.send_limiter.acquire = no_limit
+
+    async def publisher():
+        for publish_ts, title, deadlines in items:
+            await clock.sleep(publish_ts - clock.time())
+            await app.db.transaction(lambda conn: save_section(conn, game, title.lower(), title, "", None, deadlines))
+            app.invalidate_content('section')
+            app.reschedule_alerts()
+        await clock.wait(asyncio.Event())
+
+    tasks = [
+        asyncio.create_task(check_and_send_alerts(app)),
+        asyncio.create_task(deliver_outbox(app)),
+        asyncio.create_task(publisher()),
+    ]
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    await clock.run_until(end)
+    wall, cpu = time.perf_counter() - wall_started, time.process_time() - cpu_started
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    app.db.close()
+
+    missed = [(chat_id, *key) for chat_id in subscribers for key in expected if not received[(chat_id, *key)]]
+    duplicates = sum(count - 1 for count in received.values() if count > 1)
+    late = [value for value in lateness if value > args.tolerance]
+    return {
+        "timestamp": int(time.time()),
+        "scenario": {
+            "days": args.days, "items": args.items, "subscribers": args.subscribers,
+            "servers": len(regions), "thresholds": thresholds, "seed": args.seed,
+        },
+        "expected_alerts": len(expected) * len(subscribers),
+        "received_alerts": sum(received.values()),
+        "missed": len(missed),
+        "missed_examples": [list(entry) for entry in missed[:10]],
+        "late": len(late),
+        "duplicates": duplicates,
+        "unexpected": sum(unexpected.values()),
+        "unexpected_examples": [list(key) for key in list(unexpected)[:10]],
+        "lateness_s": {
+            "p50": percentile(lateness, 0.50),
+            "p99": percentile(lateness, 0.99),
+            "max": max(lateness, default=None),
+        },
+        "wall_s": wall,
+        "wall_s_per_day": wall / args.days,
+        "cpu_s_per_day": cpu / args.days,
+        "alerts_per_wall_s": sum(received.values()) / wall if wall > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a season of alerts in accelerated virtual time")
+    parser.add_argument("--days", type=int, default=42)
+    parser.add_argument("--items", type=int, default=60, help="content items published over the season")
+    parser.add_argument("--subscribers", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1, help="virtual seconds before an alert counts as late")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file as well as stdout")
+    args = parser.parse_args()
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    logging.disable(logging.WARNING)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    sys.exit(1 if report["missed"] or report["duplicates"] or report["late"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""بوت مواعيد Genshin كحزمة قابلة للتضمين.
+
+    from genshin_bot import Config, create_app
+    app = create_app(Config(bot_token=..., owner_id=...))
+    await app.run_polling()
+
+الاستيراد نفسه بدون آثار جانبية، و App/create_app تُحمّل (مع aiogram) عند
+أول استخدام فقط، فتبقى genshin_bot.formatting مثلاً سريعة الاستيراد.
+"""
+from .config import Config
+
+__all__ = ["App", "Config", "create_app"]
+
+
+def __getattr__(name):
+    if name in ("App", "create_app"):
+        from . import app
+        return getattr(app, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
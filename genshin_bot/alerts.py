@@ -0,0 +1,285 @@
+"""محرك التنبيهات: جدول المواعيد القادمة (heap) وصندوق الإرسال (alert_outbox)."""
+import asyncio
+import heapq
+import logging
+from collections import deque
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+
+from .content import archive_content
+from .formatting import alert_type_for, arabic_section_titles, duration_ar, escape_markdown
+
+# لا نحمّل إلا المواعيد القريبة؛ المهمة تعيد البناء تلقائياً عند نهاية النافذة
+ALERT_SCHEDULE_WINDOW = 6 * 3600
+
+async def build_alert_schedule(app, now_ts: int) -> list:
+    thresholds = app.config.alert_thresholds
+    app.alert_schedule_horizon = now_ts + ALERT_SCHEDULE_WINDOW
+    window_end = app.alert_schedule_horizon + (thresholds[0] if thresholds else 0)
+
+    sent = set(await app.db.fetchall("SELECT content_id, server, alert_type FROM sent_alerts"))
+
+    # بحث نطاقي واحد على فهرس content_deadlines لكل الألعاب والسيرفرات
+    rows = await app.db.fetchall("""
+        SELECT d.content_id, d.region, d.deadline FROM content_deadlines d
+        JOIN content c ON c.id = d.content_id
+        WHERE d.deadline <= ? AND c.section != 'events'
+    """, (window_end,))
+    heap = []
+    for content_id, server, end_ts in rows:
+        pending = []
+        for threshold in thresholds + [0]:
+            if (content_id, server, alert_type_for(threshold)) in sent:
+                # أُرسل تنبيه أصغر (مثلاً استحقت عتبتان معاً فأرسلنا الأصغر): ما قبله فات وقته
+                pending.clear()
+                continue
+            pending.append(threshold)
+
+        overdue = None
+        for threshold in pending:
+            due_ts = end_ts - threshold
+            if due_ts <= now_ts:
+                # من التنبيهات المستحقة فعلاً نرسل الأحدث فقط (الأصغر عتبة)
+                overdue = (due_ts, content_id, server, threshold)
+            elif due_ts <= app.alert_schedule_horizon:
+                heap.append((due_ts, content_id, server, threshold))
+        if overdue:
+            heap.append(overdue)
+    heapq.heapify(heap)
+    return heap
+
+async def enqueue_due_alerts(app, due_entries, now_ts: int):
+    # إذا استحقت عدة عتبات لنفس السيرفر معاً نكتفي بالأصغر
+    latest = {}
+    for _, content_id, server, threshold in due_entries:
+        key = (content_id, server)
+        if key not in latest or threshold < latest[key]:
+            latest[key] = threshold
+
+    for (content_id, server), threshold in latest.items():
+        row = await app.db.fetchone("SELECT game, section, title FROM content WHERE id = ?", (content_id,))
+        if not row:
+            continue
+        game, section, title = row
+        server_data = dict(await app.db.fetchall("SELECT region, deadline FROM content_deadlines WHERE content_id = ?", (content_id,)))
+        end_ts = server_data.get(server)
+        if end_ts is None:
+            continue
+        # الموعد تغيّر بعد الجدولة، سيتم التعامل معه في البناء التالي
+        if end_ts - threshold > now_ts:
+            continue
+
+        alert_type = alert_type_for(threshold)
+        subscribers = [
+            chat_id for chat_id, sections, regions in await app.cache.get('subscriptions')
+            if (sections is None or section in sections) and (regions is None or server in regions)
+        ]
+
+        # تحديد اسم المحتوى في الرسالة
+        content_name = title or arabic_section_titles.get(section, section)
+        server_name = (await app.region_labels(game)).get(server, server)
+        # العنوان يكتبه المشرف: رمز Markdown غير مغلق فيه يجعل Telegram يرفض الرسالة
+        content_md, server_md = escape_markdown(content_name), escape_markdown(server_name)
+
+        if threshold:
+            message_text = (
+                f"🔔 **تنبيه الإنتهاء ({duration_ar(threshold)}):**\n"
+                f"**{content_md}** - سيرفر **{server_md}**\n"
+                f"⏳ الوقت المتبقي: حوالي {duration_ar(threshold)}."
+            )
+        else:
+            message_text = (
+                f"❌ **انتهى المحتوى:**\n"
+                f"**{content_md}** - سيرفر **{server_md}**\n"
+                f"تم إزالة المحتوى من اللعبة."
+            )
+        # 🟢 تسجيل التنبيه ووضعه في صندوق الإرسال في نفس المعاملة، فلا يضيع ولا يتكرر
+        def record_alert(conn):
+            inserted = conn.execute("INSERT OR IGNORE INTO sent_alerts (content_id, server, alert_type) VALUES (?, ?, ?)", (content_id, server, alert_type)).rowcount
+            if inserted:
+                conn.executemany("""
+                    INSERT INTO alert_outbox (chat_id, text, created_at, next_attempt_at)
+                    VALUES (?, ?, ?, ?)
+                """, [(chat_id, message_text, now_ts, now_ts) for chat_id in subscribers])
+
+            # اختيارياً: حذف المحتوى بالكامل بعد انتهاءه وتسجيل تنبيهه في جميع السيرفرات
+            if threshold or not all(t <= now_ts for t in server_data.values()):
+                return inserted, False
+            expired_alerts = conn.execute("SELECT COUNT(*) FROM sent_alerts WHERE content_id = ? AND alert_type = 'expired'", (content_id,)).fetchone()[0]
+            if expired_alerts < len(server_data):
+                return inserted, False
+            archive_content(conn, [content_id], now_ts)
+            return inserted, True
+
+        inserted, deleted = await app.db.transaction(record_alert)
+        if inserted:
+            app.outbox_wakeup.set()
+            app.metrics.inc("alerts_queued", len(subscribers))
+            logging.info(f"Alert queued: {content_name} - {server} ({alert_type}) for {len(subscribers)} chats")
+        if deleted:
+            app.invalidate_content('section')
+            logging.info(f"Content archived: {content_name} (ID: {content_id})")
+
+async def check_and_send_alerts(app):
+    """المهمة الخلفية: تنام حتى موعد التنبيه القادم بدلاً من الفحص الدوري."""
+    clock = app.clock
+    while True:
+        try:
+            if app.alert_schedule_changed.is_set():
+                app.alert_schedule_changed.clear()
+                app.alert_heap = await build_alert_schedule(app, int(clock.time()))
+
+            now_ts = int(clock.time())
+            due_entries = []
+            while app.alert_heap and app.alert_heap[0][0] <= now_ts:
+                due_entries.append(heapq.heappop(app.alert_heap))
+            for due_ts, *_ in due_entries:
+                app.metrics.observe("alert_lag_seconds", clock.time() - due_ts)
+            if due_entries:
+                await enqueue_due_alerts(app, due_entries, now_ts)
+
+        except Exception as e:
+            logging.error(f"Error in alert system task: {e}")
+            # نعيد البناء بعد مهلة حتى لا تضيع التنبيهات التي فشل إرسالها
+            app.alert_schedule_changed.set()
+            await clock.sleep(30)
+            continue
+
+        # الانتظار حتى أقرب موعد تنبيه أو نهاية النافذة أو حتى يتغير المحتوى
+        horizon = app.alert_schedule_horizon
+        wake_at = min(app.alert_heap[0][0], horizon) if app.alert_heap else horizon
+        if not await clock.wait(app.alert_schedule_changed, max(0, wake_at - clock.time())):
+            if clock.time() >= horizon:
+                app.alert_schedule_changed.set()
+
+# --- Alert Delivery (Outbox) ---
+
+OUTBOX_BATCH_SIZE = 5000
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_MAX_BACKOFF = 3600
+# الدفعة تُحجز بتأجيل next_attempt_at قبل إرسالها؛ الحذف بعد الإرسال يلغي الحجز
+OUTBOX_CLAIM_SECONDS = 60
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+def coalesce_outbox_rows(rows) -> list:
+    """يدمج التنبيهات المستحقة لنفس المحادثة في أقل عدد من الرسائل: [(ids, text), ...]"""
+    messages = []
+    ids, text = [], ""
+    for row_id, row_text in rows:
+        if text and len(text) + 2 + len(row_text) > TELEGRAM_MESSAGE_LIMIT:
+            messages.append((ids, text))
+            ids, text = [], ""
+        ids.append(row_id)
+        text = f"{text}\n\n{row_text}" if text else row_text
+    if ids:
+        messages.append((ids, text))
+    return messages
+
+async def postpone_outbox(app, ids, attempts: int, delay: int):
+    now_ts = int(app.clock.time())
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        logging.error(f"Dropping alerts {ids} after {attempts} failed attempts")
+        await app.db.executemany("DELETE FROM alert_outbox WHERE id = ?", [(row_id,) for row_id in ids])
+        return
+    await app.db.executemany(
+        "UPDATE alert_outbox SET attempts = ?, next_attempt_at = ? WHERE id = ?",
+        [(attempts, now_ts + delay, row_id) for row_id in ids]
+    )
+
+async def deliver_chat_alerts(app, chat_id: int, rows):
+    attempts = max(row[2] for row in rows)
+    texts = {row[0]: row[1] for row in rows}
+    messages = deque(coalesce_outbox_rows([(row[0], row[1]) for row in rows]))
+    while messages:
+        ids, text = messages.popleft()
+        await app.send_limiter.acquire(chat_id)
+        try:
+            await app.bot.send_message(chat_id, text, parse_mode="Markdown")
+        except TelegramRetryAfter as e:
+            logging.warning(f"Flood control for chat {chat_id}, retrying in {e.retry_after}s")
+            await postpone_outbox(app, ids + [row_id for pending_ids, _ in messages for row_id in pending_ids], attempts, e.retry_after)
+            return
+        except (TelegramForbiddenError, TelegramNotFound) as e:
+            # البوت محظور أو أُزيل من المحادثة: نلغي اشتراكها وكل ما في صندوقها
+            await drop_subscription(app, chat_id)
+            logging.warning(f"Dropped subscription for chat {chat_id}: {e}")
+            return
+        except TelegramBadRequest as e:
+            if "chat not found" in str(e).lower():
+                await drop_subscription(app, chat_id)
+                logging.warning(f"Dropped subscription for chat {chat_id}: {e}")
+                return
+            # 🟢 خطأ دائم في نص الرسالة: إعادة المحاولة لن تنجح. نرسل الرسالة المدمجة
+            # تنبيهاً تنبيهاً حتى لا يُسقط تنبيه معطوب التنبيهات السليمة معه
+            if len(ids) > 1:
+                messages.extendleft(([row_id], texts[row_id]) for row_id in reversed(ids))
+                continue
+            logging.error(f"Dropping alert {ids[0]} for chat {chat_id}: {e}")
+            await app.db.execute("DELETE FROM alert_outbox WHERE id = ?", (ids[0],))
+            app.metrics.inc("alerts_dropped")
+            continue
+        except Exception as e:
+            delay = min(OUTBOX_MAX_BACKOFF, 5 * 2 ** attempts)
+            logging.error(f"Failed to deliver alerts to {chat_id}: {e} (retry in {delay}s)")
+            await postpone_outbox(app, ids, attempts + 1, delay)
+            return
+        await app.db.executemany("DELETE FROM alert_outbox WHERE id = ?", [(row_id,) for row_id in ids])
+        app.metrics.inc("alerts_sent", len(ids))
+        logging.info(f"Alert sent to {chat_id} ({len(ids)} queued alerts)")
+
+async def drop_subscription(app, chat_id: int):
+    def delete_chat(conn):
+        conn.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,))
+        conn.execute("DELETE FROM alert_outbox WHERE chat_id = ?", (chat_id,))
+
+    await app.db.transaction(delete_chat)
+    app.cache.invalidate('subscriptions')
+
+async def deliver_outbox(app):
+    """المهمة الخلفية لإرسال التنبيهات من alert_outbox مع احترام حدود Telegram."""
+    while True:
+        timeout = None
+        try:
+            app.outbox_wakeup.clear()
+            now_ts = int(app.clock.time())
+            rows = await app.db.fetchall("""
+                SELECT id, chat_id, text, attempts FROM alert_outbox
+                WHERE next_attempt_at <= ? ORDER BY id LIMIT ?
+            """, (now_ts, OUTBOX_BATCH_SIZE))
+            if rows:
+                # 🟢 نحجز الصفوف قبل الإرسال: إن فشل حذفها بعده (القاعدة مشغولة مثلاً) لا تعود
+                # مستحقة فوراً فيُعاد إرسالها في حلقة سريعة
+                await app.db.executemany(
+                    "UPDATE alert_outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now_ts + OUTBOX_CLAIM_SECONDS, row[0]) for row in rows]
+                )
+                by_chat = {}
+                for row_id, chat_id, text, attempts in rows:
+                    by_chat.setdefault(chat_id, []).append((row_id, text, attempts))
+                # إرسال متوازٍ لعدد محدود من المحادثات في نفس الوقت
+                semaphore = asyncio.Semaphore(app.config.delivery_concurrency)
+
+                async def deliver(chat_id, chat_rows):
+                    async with semaphore:
+                        await deliver_chat_alerts(app, chat_id, chat_rows)
+
+                results = await asyncio.gather(
+                    *(deliver(chat_id, chat_rows) for chat_id, chat_rows in by_chat.items()),
+                    return_exceptions=True
+                )
+                failures = [result for result in results if isinstance(result, Exception)]
+                for result in failures:
+                    logging.error(f"Error delivering alerts: {result}")
+                if len(failures) < len(results):
+                    continue
+                # لم تتقدم أي محادثة: ننتظر قبل المحاولة التالية
+                timeout = 30
+            else:
+                next_attempt = (await app.db.fetchone("SELECT MIN(next_attempt_at) FROM alert_outbox"))[0]
+                if next_attempt is not None:
+                    timeout = max(0, next_attempt - app.clock.time())
+        except Exception as e:
+            logging.error(f"Error in alert delivery task: {e}")
+            timeout = 30
+
+        await app.clock.wait(app.outbox_wakeup, timeout)
@@ -0,0 +1,367 @@
+"""نسخة البوت (App) ومصنعها create_app.
+
+كل الحالة التي كانت على مستوى الوحدة (القاعدة، الكاش، القياسات، جداول
+التنبيهات...) صارت على App، فيمكن تشغيل أكثر من نسخة في نفس العملية.
+Bot و Dispatcher (مع المعالجات) وراسم البطاقات تُنشأ عند أول استخدام فقط،
+ومهام الخلفية تبدأ مع الـ lease عند تشغيل Dispatcher.
+"""
+import asyncio
+import ipaddress
+import itertools
+import logging
+import os
+import signal
+import socket
+from collections import OrderedDict
+from contextlib import suppress
+from functools import cached_property
+
+from .alerts import check_and_send_alerts, deliver_outbox
+from .cache import Cache
+from .clock import Clock
+from .config import Config
+from .content import register_loaders
+from .db import Database
+from .fsm_storage import SQLiteStorage
+from .lease import LeaderLease
+from .live import update_live_messages
+from .maintenance import compact_database, expire_events, run_backups
+from .metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware, Metrics
+from .ratelimit import SendLimiter, TokenBucket
+from .schema import ensure_schema
+
+# رقم النسخة داخل العملية (لـ instance_id الافتراضي)
+instance_numbers = itertools.count(1)
+
+
+class App:
+    def __init__(self, config: Config):
+        self.config = config
+        self.instance_id = config.instance_id or f"{socket.gethostname()}:{os.getpid()}:{next(instance_numbers)}"
+
+        # 🟢 كل قراءات "الآن" وانتظارات محرك التنبيهات ومسارات العرض تمر عبر clock،
+        # فتستبدله المحاكاة (benchmarks/simulate.py) بساعة افتراضية أسرع
+        self.clock = Clock()
+        # 🟢 قياسات زمن المعالجات والاستعلامات واستدعاءات API (تُعرض عبر /stats و metrics_port)
+        self.metrics = Metrics()
+        # كل الاستعلامات تمر عبر db.Database حتى لا تحجب حلقة الأحداث
+        self.db = Database(config.db_path, readers=config.db_readers, on_query=self.metrics.on_query)
+        # 🟢 حالات التحديث تُحفظ في القاعدة فلا تضيع عند إعادة التشغيل
+        self.storage = SQLiteStorage(self.db, ttl=config.fsm_ttl, lru_size=config.fsm_lru_size)
+
+        self.cache = Cache()
+        register_loaders(self)
+        # الكاش محلي لكل نسخة: كل إبطال يرفع نسخة المفتاح في cache_versions
+        # وبقية النسخ تلتقطه في النبضة التالية.
+        self.cache.on_invalidate = self.publish_invalidation
+        self.cache_versions = {}
+        self.publish_tasks = set()
+
+        # كومة (min-heap) بمواعيد التنبيهات القادمة: (due_ts, content_id, server, threshold)
+        self.alert_heap = []
+        self.alert_schedule_changed = asyncio.Event()
+        self.alert_schedule_changed.set() # البناء الأول عند تشغيل المهمة
+        self.alert_schedule_horizon = 0
+        self.outbox_wakeup = asyncio.Event()
+        self.send_limiter = SendLimiter()
+
+        self.render_cache = {}
+        self.render_inflight = {}
+        self.burst_pending = {}
+        self.inline_results = {}
+        self.card_file_ids = OrderedDict()
+        self.card_inflight = {}
+
+        self.live_edit_budget = TokenBucket(config.live_edit_rate, 5)
+        self.live_refresh = asyncio.Event()
+        self.live_refresh.set() # مراجعة كل الرسائل عند التشغيل
+        self.events_expiry_changed = asyncio.Event()
+        self.backup_lock = asyncio.Lock()
+
+        # 🟢 عند تشغيل عدة نسخ على نفس القاعدة: كل النسخ تخدم الأوامر، وصاحب الـ lease
+        # وحده يشغّل التنبيهات والتوصيل والتنظيف. (وضع polling يقبل نسخة واحدة فقط لدى
+        # Telegram، لذا التوسع الأفقي يكون بوضع webhook خلف موزع حمل.)
+        self.lease = LeaderLease(self.db, "alerts", self.instance_id, ttl=config.lease_ttl)
+        self.leader_tasks = []
+        self.background_tasks = []
+        self.metrics_runner = None
+
+    # --- Lazy components ---
+
+    @cached_property
+    def bot(self):
+        from aiogram import Bot
+        from aiogram.client.session.aiohttp import AiohttpSession
+        from aiogram.client.telegram import TelegramAPIServer
+
+        if self.config.telegram_api_url:
+            bot = Bot(token=self.config.bot_token, session=AiohttpSession(api=TelegramAPIServer.from_base(self.config.telegram_api_url)))
+        else:
+            bot = Bot(token=self.config.bot_token)
+        bot.session.middleware(ApiMetricsMiddleware(self.metrics))
+        return bot
+
+    @cached_property
+    def dp(self):
+        from aiogram import Dispatcher
+
+        from .throttling import ThrottlingMiddleware, parse_limits
+
+        from .handlers import build_router, throttle_groups
+
+        # المعالجات تصلها هذه النسخة عبر المعامل app (workflow data)
+        dp = Dispatcher(storage=self.storage, app=self)
+        # 🟢 حدود التكرار لكل محادثة ولكل مستخدم حسب مجموعة الأوامر (المشرفون مستثنون)
+        throttling = ThrottlingMiddleware(
+            chat_limits=parse_limits(self.config.throttle_chat_limits),
+            user_limits=parse_limits(self.config.throttle_user_limits),
+            groups=throttle_groups,
+            is_exempt=self.is_admin,
+            metrics=self.metrics,
+            max_entries=self.config.throttle_lru_size,
+        )
+        # الترتيب مهم: التحديثات المرفوضة لا تدخل في قياسات زمن المعالجات
+        for observer in (dp.message, dp.callback_query, dp.inline_query):
+            observer.middleware(throttling)
+            observer.middleware(HandlerMetricsMiddleware(self.metrics, slow_threshold=self.config.slow_handler_ms / 1000))
+        dp.include_router(build_router())
+        dp.startup.register(self.on_startup)
+        dp.shutdown.register(self.on_shutdown)
+        return dp
+
+    @cached_property
+    def card_renderer(self):
+        # Pillow يُستورد فقط عند تفعيل البطاقات
+        if not self.config.card_images:
+            return None
+        from . import cards
+        if not cards.AVAILABLE:
+            logging.warning("CARD_IMAGES=1 but Pillow is not installed; sending plain captions")
+            return None
+        return cards.CardRenderer(self.config.card_font)
+
+    # --- Shared helpers ---
+
+    async def is_admin(self, user_id: int) -> bool:
+        return user_id in await self.cache.get('admins')
+
+    async def region_labels(self, game: str) -> dict:
+        return {server: label or server for server, _, label in await self.cache.get('regions', game)}
+
+    def invalidate_content(self, *keys, propagate: bool = True):
+        self.cache.invalidate(*keys, propagate=propagate)
+        self.render_cache.clear()
+        self.inline_results.clear()
+        self.live_refresh.set()
+        self.events_expiry_changed.set()
+
+    def reschedule_alerts(self):
+        """يُستدعى بعد أي تعديل على المحتوى لإعادة بناء جدول التنبيهات."""
+        self.alert_schedule_changed.set()
+
+    # --- Multi-instance (Leader Lease) ---
+
+    def publish_invalidation(self, keys):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        def bump(conn):
+            # لا نستخدم RETURNING (يتطلب SQLite 3.35): نقرأ النسخة في نفس المعاملة
+            versions = {}
+            for key in keys or ('*',):
+                conn.execute("""
+                    INSERT INTO cache_versions (key, version, instance) VALUES (?, 1, ?)
+                    ON CONFLICT (key) DO UPDATE SET version = version + 1, instance = excluded.instance
+                """, (key, self.instance_id))
+                versions[key] = conn.execute("SELECT version FROM cache_versions WHERE key = ?", (key,)).fetchone()[0]
+            return versions
+
+        task = asyncio.ensure_future(self.record_published_versions(self.db.transaction(bump)))
+        self.publish_tasks.add(task)
+        task.add_done_callback(self.publish_tasks.discard)
+
+    async def record_published_versions(self, bumped):
+        # 🟢 نقارن أرقام النسخ لا معرّف النسخة: إن رفعت نسخة أخرى نفس المفتاح قبلنا
+        # (القفزة أكبر من 1) فتغييرها لم يصلنا بعد
+        try:
+            versions = await bumped
+        except Exception as e:
+            # المهمة لا ينتظرها أحد: بدون هذا يضيع الخطأ ولا تصل النسخ الأخرى
+            logging.error(f"Failed to publish cache invalidation: {e}")
+            return
+        missed = []
+        for key, version in versions.items():
+            if self.cache_versions.get(key, 0) not in (version - 1, version):
+                missed.append(key)
+            self.cache_versions[key] = version
+        if missed:
+            self.apply_remote_invalidation(missed)
+
+    async def sync_cache_versions(self):
+        changed = []
+        for key, version in await self.db.fetchall("SELECT key, version FROM cache_versions"):
+            if self.cache_versions.get(key, 0) != version:
+                self.cache_versions[key] = version
+                changed.append(key)
+        if changed:
+            self.apply_remote_invalidation(changed)
+
+    def apply_remote_invalidation(self, changed):
+        keys = () if '*' in changed else tuple(changed)
+        self.invalidate_content(*keys, propagate=False)
+        if not keys:
+            # '*' تنشره الاستعادة أيضاً: حالات FSM المحفوظة في الذاكرة قد تكون قديمة
+            self.storage._lru.clear()
+        if not keys or {'section', 'events', 'regions'} & set(keys):
+            self.reschedule_alerts()
+        logging.info(f"Cache invalidated by another instance: {', '.join(changed)}")
+
+    def start_leader_tasks(self):
+        # ربما تغيرت البيانات أثناء الانتظار: نعيد بناء الجداول من القاعدة
+        self.reschedule_alerts()
+        self.live_refresh.set()
+        self.leader_tasks.extend([
+            asyncio.create_task(check_and_send_alerts(self)),
+            asyncio.create_task(deliver_outbox(self)),
+            asyncio.create_task(self.storage.run_sweeper()),
+            asyncio.create_task(update_live_messages(self)),
+            asyncio.create_task(expire_events(self)),
+            asyncio.create_task(compact_database(self)),
+        ])
+        if self.config.backup_interval > 0:
+            self.leader_tasks.append(asyncio.create_task(run_backups(self)))
+
+    async def stop_leader_tasks(self):
+        for task in self.leader_tasks:
+            task.cancel()
+        await asyncio.gather(*self.leader_tasks, return_exceptions=True)
+        self.leader_tasks.clear()
+
+    async def run_leadership(self):
+        """المهمة الخلفية: تجدد الـ lease وتشغّل مهام القائد أو توقفها حسبه."""
+        while True:
+            try:
+                await self.sync_cache_versions()
+                is_leader = await self.lease.acquire()
+            except Exception as e:
+                logging.error(f"Error renewing leader lease: {e}")
+                # نبقى قائداً فقط ما دام آخر تجديد ناجح لم ينتهِ
+                is_leader = self.lease.held()
+
+            if is_leader and not self.leader_tasks:
+                logging.info(f"Instance {self.instance_id} acquired the leader lease")
+                self.metrics.inc("lease_acquired")
+                self.start_leader_tasks()
+            elif not is_leader and self.leader_tasks:
+                logging.warning(f"Instance {self.instance_id} lost the leader lease")
+                await self.stop_leader_tasks()
+            await asyncio.sleep(self.config.lease_heartbeat)
+
+    # --- Startup / Shutdown ---
+
+    async def start_metrics_server(self):
+        # نقطة Prometheus اختيارية: metrics_port (محلياً فقط افتراضياً)
+        port = self.config.metrics_port
+        if not port:
+            return
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(text=self.metrics.render_prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        self.metrics_runner = web.AppRunner(app)
+        await self.metrics_runner.setup()
+        await web.TCPSite(self.metrics_runner, self.config.metrics_host, port).start()
+        logging.info(f"Metrics endpoint listening on port {port}")
+
+    async def on_startup(self):
+        await self.start_metrics_server()
+        # 🟢 مهام التنبيهات الخلفية تبدأ عند الحصول على الـ lease (في وضعي polling و webhook)
+        self.background_tasks.append(asyncio.create_task(self.run_leadership()))
+
+    async def on_shutdown(self):
+        for task in self.background_tasks:
+            task.cancel()
+        await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        self.background_tasks.clear()
+        await self.stop_leader_tasks()
+        # التخلي عن الـ lease حتى تستلمه نسخة أخرى فوراً بدلاً من انتظار LEASE_TTL
+        try:
+            await self.lease.release()
+        except Exception as e:
+            logging.error(f"Error releasing leader lease: {e}")
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+            self.metrics_runner = None
+
+    async def run_polling(self, **kwargs):
+        await self.bot.delete_webhook()
+        await self.dp.start_polling(self.bot, **kwargs)
+
+    async def run_webhook(self):
+        # بدون webhook_url لا نسجل webhook لدى Telegram ويمكن تجربة الخادم محلياً
+        # بإرسال POST بتحديثات وهمية.
+        from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+        from aiohttp import web
+
+        config = self.config
+        if not config.webhook_secret and not is_loopback(config.webhook_host):
+            raise RuntimeError(f"WEBHOOK_SECRET is required when the webhook server listens on {config.webhook_host}")
+
+        app = web.Application()
+        SimpleRequestHandler(dispatcher=self.dp, bot=self.bot, secret_token=config.webhook_secret).register(app, path=config.webhook_path)
+        setup_application(app, self.dp, bot=self.bot)
+
+        # 🟢 start_polling يلتقط SIGINT/SIGTERM بنفسه؛ هنا نلتقطها حتى يعمل on_shutdown
+        # (تسليم الـ lease فوراً) عند docker stop أو systemctl stop
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        signals = (signal.SIGINT, signal.SIGTERM)
+        for sig in signals:
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, config.webhook_host, config.webhook_port).start()
+            if config.webhook_url:
+                await self.bot.set_webhook(config.webhook_url.rstrip("/") + config.webhook_path, secret_token=config.webhook_secret)
+            logging.info(f"Webhook server listening on {config.webhook_host}:{config.webhook_port}{config.webhook_path}")
+            await stop.wait()
+            logging.info("Webhook server stopping")
+        finally:
+            for sig in signals:
+                with suppress(NotImplementedError):
+                    loop.remove_signal_handler(sig)
+            # cleanup يستدعي on_shutdown فيوقف مهام التنبيهات
+            await runner.cleanup()
+
+    async def close(self):
+        if 'bot' in self.__dict__:
+            await self.bot.session.close()
+        self.db.close()
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_app(config: Config = None) -> App:
+    """ينشئ نسخة من البوت؛ config = None يقرأ الإعدادات من متغيرات البيئة.
+
+    يفتح القاعدة ويرحّلها فقط إذا تغيّرت نسخة المخطط، ولا يتصل بـ Telegram.
+    """
+    app = App(config or Config.from_env())
+    if ensure_schema(app.db, app.config):
+        logging.info(f"Database {app.config.db_path} prepared (schema and defaults)")
+    return app
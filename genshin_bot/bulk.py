@@ -0,0 +1,129 @@
+"""صيغ الاستيراد والتصدير الجماعي للمحتوى: JSON و CSV ورسالة متعددة الأسطر.
+
+كل الصيغ تتحول إلى نفس الشكل (الأوقات نصية بتوقيت كل سيرفر):
+
+    {"sections": [{"section", "title", "name", "image_file_id", "times": {server: "YYYY-MM-DD HH:MM:SS"}}],
+     "events": [{"name", "time"}]}
+
+وقت الحدث بتوقيت أول سيرفر للعبة، كما في /setevents.
+"""
+import csv
+import io
+import json
+
+BASE_FIELDS = ("section", "title", "name", "image_file_id")
+
+
+def _split_items(items) -> dict:
+    doc = {"sections": [], "events": []}
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("كل عنصر يجب أن يكون كائن JSON")
+        if str(item.get("section", "")).lower() == "events":
+            doc["events"].append(item)
+        else:
+            doc["sections"].append(item)
+    return doc
+
+
+def parse_json(data: bytes) -> dict:
+    try:
+        doc = json.loads(data.decode("utf-8-sig"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"ملف JSON غير صالح: {e}")
+    # نقبل أيضاً قائمة مسطحة من العناصر (section = 'events' للأحداث)
+    if isinstance(doc, list):
+        return _split_items(doc)
+    if not isinstance(doc, dict):
+        raise ValueError("ملف JSON يجب أن يكون كائناً أو قائمة")
+    sections, events = doc.get("sections", []), doc.get("events", [])
+    if not isinstance(sections, list) or not isinstance(events, list):
+        raise ValueError("sections و events يجب أن تكونا قوائم")
+    return {"sections": sections, "events": events}
+
+
+def parse_csv(data: bytes) -> dict:
+    """الأعمدة: section,title,name,image_file_id ثم عمود لكل سيرفر (أو time للأحداث)."""
+    try:
+        reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+        rows = list(reader)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"ملف CSV غير صالح: {e}")
+    if not reader.fieldnames or "section" not in reader.fieldnames:
+        raise ValueError("ملف CSV يجب أن يحتوي على عمود section")
+    region_columns = [field for field in reader.fieldnames if field not in BASE_FIELDS and field != "time"]
+
+    doc = {"sections": [], "events": []}
+    for row in rows:
+        section = (row.get("section") or "").strip().lower()
+        if section == "events":
+            time_value = row.get("time") or next((row[c] for c in region_columns if row.get(c)), "")
+            doc["events"].append({"name": (row.get("name") or "").strip(), "time": time_value.strip()})
+        else:
+            doc["sections"].append({
+                "section": section,
+                "title": (row.get("title") or "").strip(),
+                "name": (row.get("name") or "").strip(),
+                "image_file_id": (row.get("image_file_id") or "").strip() or None,
+                "times": {c: row[c].strip() for c in region_columns if row.get(c)},
+            })
+    return doc
+
+
+def parse_lines(text: str, servers: list) -> dict:
+    """سطر لكل عنصر، والأوقات بترتيب السيرفرات:
+
+        banner ; العنوان ; اسم الحدث ; وقت آسيا ; وقت أوروبا ; وقت أمريكا
+        abyss ; العنوان ; وقت آسيا ; وقت أوروبا ; وقت أمريكا
+        events ; اسم الحدث ; الوقت
+    """
+    doc = {"sections": [], "events": []}
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        parts = [p.strip() for p in line.split(";")]
+        section = parts[0].lower()
+        if section == "events":
+            if len(parts) != 3:
+                raise ValueError(f"السطر {number}: الصيغة events ; اسم الحدث ; YYYY-MM-DD HH:MM:SS")
+            doc["events"].append({"name": parts[1], "time": parts[2]})
+            continue
+        if len(parts) == 3 + len(servers):
+            title, name, times = parts[1], parts[2], parts[3:]
+        elif len(parts) == 2 + len(servers):
+            title, name, times = parts[1], "", parts[2:]
+        else:
+            raise ValueError(f"السطر {number}: عدد الأوقات يجب أن يساوي عدد السيرفرات ({len(servers)})")
+        doc["sections"].append({
+            "section": section, "title": title, "name": name,
+            "image_file_id": None, "times": dict(zip(servers, times)),
+        })
+    return doc
+
+
+def parse_document(data: bytes, filename: str = "") -> dict:
+    if filename.lower().endswith(".csv"):
+        return parse_csv(data)
+    if filename.lower().endswith(".json") or data.lstrip()[:1] in (b"{", b"["):
+        return parse_json(data)
+    return parse_csv(data)
+
+
+def to_json(doc: dict) -> bytes:
+    return json.dumps(doc, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def to_csv(doc: dict, servers: list) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow([*BASE_FIELDS, *servers])
+    for item in doc["sections"]:
+        writer.writerow([
+            item["section"], item["title"] or "", item["name"] or "", item["image_file_id"] or "",
+            *(item["times"].get(server, "") for server in servers),
+        ])
+    for event in doc["events"]:
+        # وقت الحدث في عمود أول سيرفر
+        writer.writerow(["events", "", event["name"], "", event["time"], *[""] * (len(servers) - 1)])
+    # utf-8-sig حتى يفتح Excel النص العربي بشكل صحيح
+    return out.getvalue().encode("utf-8-sig")
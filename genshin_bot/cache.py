@@ -0,0 +1,57 @@
+"""كاش بسيط في الذاكرة أمام قاعدة البيانات (read-through).
+
+كل مفتاح له دالة تحميل غير متزامنة؛ القراءة الأولى تحمّل القيمة من القاعدة
+والقراءات التالية تُخدم من الذاكرة حتى يُستدعى invalidate من مسارات الكتابة.
+"""
+
+
+class Cache:
+    def __init__(self):
+        self._values = {}
+        self._loaders = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        # on_invalidate(keys): خطاف اختياري لإبلاغ نسخ البوت الأخرى بالإبطال
+        self.on_invalidate = None
+
+    def register(self, key, loader):
+        """يسجّل دالة التحميل لمفتاح؛ loader(*args) ترجع القيمة من القاعدة."""
+        self._loaders[key] = loader
+
+    async def get(self, key, *args):
+        cache_key = (key, *args)
+        if cache_key in self._values:
+            self.hits += 1
+            return self._values[cache_key]
+
+        self.misses += 1
+        generation = self._generation
+        value = await self._loaders[key](*args)
+        # لا نخزّن نتيجة تحميل بدأ قبل إبطال حدث أثناءه
+        if generation == self._generation:
+            self._values[cache_key] = value
+        return value
+
+    def invalidate(self, *keys, propagate: bool = True):
+        """يبطل المفاتيح المحددة (بكل معاملاتها)، أو كل الكاش بدون معاملات.
+
+        propagate=False للإبطالات القادمة من نسخة أخرى (حتى لا تُعاد إليها).
+        """
+        self._generation += 1
+        if propagate and self.on_invalidate is not None:
+            self.on_invalidate(keys)
+        if not keys:
+            self._values.clear()
+            return
+        for cache_key in [k for k in self._values if k[0] in keys]:
+            del self._values[cache_key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': len(self._values),
+        }
@@ -0,0 +1,110 @@
+"""رسم بطاقات العد التنازلي كصور (اختياري، يتطلب Pillow).
+
+الخطوط وطبقة التعتيم تُحمّل مرة واحدة، وصورة القسم (البنر) تُفك مرة واحدة لكل
+file_id ثم يُعاد استخدامها. الرسم نفسه متزامن (CPU) ويُستدعى خارج حلقة الأحداث.
+
+النص العربي يحتاج تشكيلاً (shaping): نستخدم libraqm إن كانت متوفرة في Pillow،
+وإلا arabic_reshaper + python-bidi إن كانتا مثبتتين، وإلا يُرسم النص كما هو.
+"""
+import io
+import threading
+from collections import OrderedDict
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, features
+except ImportError:
+    Image = None
+
+try:
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+except ImportError:
+    arabic_reshaper = None
+
+AVAILABLE = Image is not None
+
+CARD_SIZE = (1280, 720)
+DEFAULT_FONT = "DejaVuSans.ttf"
+
+
+class CardRenderer:
+    def __init__(self, font_path: str = None, size=CARD_SIZE, art_cache_size: int = 8):
+        if not AVAILABLE:
+            raise RuntimeError("Pillow is not installed")
+        self.size = size
+        self.raqm = features.check("raqm")
+        layout = ImageFont.Layout.RAQM if self.raqm else ImageFont.Layout.BASIC
+        self.fonts = {
+            name: self._load_font(font_path, points, layout)
+            for name, points in (("title", 64), ("subtitle", 42), ("row", 36))
+        }
+        # تدرج داكن أسفل البطاقة ليبقى النص مقروءاً فوق أي صورة
+        self.overlay = self._make_overlay()
+        self.plain_background = Image.new("RGBA", size, (24, 28, 48, 255))
+        self.art_cache_size = art_cache_size
+        self._art = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_font(font_path, points, layout):
+        try:
+            return ImageFont.truetype(font_path or DEFAULT_FONT, points, layout_engine=layout)
+        except OSError:
+            return ImageFont.load_default(points)
+
+    def _make_overlay(self):
+        mask = Image.linear_gradient("L").resize(self.size)
+        shade = Image.new("RGBA", self.size, (8, 10, 20, 255))
+        shade.putalpha(mask.point(lambda value: int(value * 0.85)))
+        return shade
+
+    def has_art(self, key: str) -> bool:
+        return key in self._art
+
+    def add_art(self, key: str, data: bytes):
+        """يفك صورة القسم مرة واحدة ويقصها على مقاس البطاقة."""
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        scale = max(self.size[0] / image.width, self.size[1] / image.height)
+        image = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+        left = (image.width - self.size[0]) // 2
+        top = (image.height - self.size[1]) // 2
+        image = image.crop((left, top, left + self.size[0], top + self.size[1]))
+        composed = Image.alpha_composite(image, self.overlay)
+        with self._lock:
+            self._art[key] = composed
+            while len(self._art) > self.art_cache_size:
+                self._art.popitem(last=False)
+
+    def _shape(self, text: str) -> str:
+        if self.raqm or arabic_reshaper is None:
+            return text
+        return get_display(arabic_reshaper.reshape(text))
+
+    def _draw_text(self, draw, y, text, font, fill):
+        # محاذاة لليمين (RTL) مع ظل خفيف
+        x = self.size[0] - 60
+        kwargs = {"direction": "rtl"} if self.raqm else {}
+        text = self._shape(text)
+        draw.text((x + 2, y + 2), text, font=font, fill=(0, 0, 0, 160), anchor="ra", **kwargs)
+        draw.text((x, y), text, font=font, fill=fill, anchor="ra", **kwargs)
+
+    def render(self, art_key, title: str, subtitle: str, rows) -> bytes:
+        """يرسم البطاقة ويرجعها JPEG؛ rows = [(اسم السيرفر, الوقت المتبقي), ...]"""
+        with self._lock:
+            base = self._art.get(art_key)
+        card = (base if base is not None else self.plain_background).copy()
+        draw = ImageDraw.Draw(card)
+
+        row_height = 56
+        y = self.size[1] - 60 - row_height * len(rows)
+        for i, (label, time_left) in enumerate(rows):
+            self._draw_text(draw, y + row_height * i, f"{label}: {time_left}", self.fonts["row"], (255, 255, 255, 255))
+        if subtitle:
+            y -= 64
+            self._draw_text(draw, y, subtitle, self.fonts["subtitle"], (255, 214, 102, 255))
+        y -= 84
+        self._draw_text(draw, y, title, self.fonts["title"], (255, 255, 255, 255))
+
+        out = io.BytesIO()
+        card.convert("RGB").save(out, "JPEG", quality=88)
+        return out.getvalue()
@@ -0,0 +1,80 @@
+"""مصدر الوقت لمحرك التنبيهات ومسارات العرض.
+
+Clock هو الساعة الحقيقية. VirtualClock وقت افتراضي للمحاكاة: كل انتظار يمر
+عبر الساعة، وعندما تنام كل المهام المشاركة يقفز الوقت مباشرة إلى أقرب موعد
+استيقاظ، فتُحاكى أسابيع من التنبيهات في ثوانٍ.
+"""
+import asyncio
+import time
+
+
+class Clock:
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def wait(self, event: asyncio.Event, timeout: float = None) -> bool:
+        """ينتظر event حتى timeout ثانية (None = بلا حد)؛ يرجع True إذا ضُبط."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class VirtualClock(Clock):
+    def __init__(self, start: float, participants: int = 1):
+        self.now = start
+        # عدد المهام التي يجب أن تكون نائمة على الساعة قبل أن يتقدم الوقت
+        self.participants = participants
+        # timer future -> (wake_at أو None, event أو None)
+        self._waiters = {}
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        await self.wait(None, seconds)
+
+    async def wait(self, event: asyncio.Event, timeout: float = None) -> bool:
+        if event is not None and event.is_set():
+            return True
+        if timeout is not None and timeout <= 0:
+            await asyncio.sleep(0)
+            return event is not None and event.is_set()
+
+        timer = asyncio.get_running_loop().create_future()
+        self._waiters[timer] = (None if timeout is None else self.now + timeout, event)
+        waits = [timer]
+        if event is not None:
+            waits.append(asyncio.ensure_future(event.wait()))
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            del self._waiters[timer]
+            for waiter in waits[1:]:
+                waiter.cancel()
+        return event is not None and event.is_set()
+
+    def _idle(self) -> bool:
+        # مهمة ضُبط الحدث الذي تنتظره لم تستأنف بعد: ليست نائمة فعلاً
+        return len(self._waiters) >= self.participants and not any(
+            timer.done() or (event is not None and event.is_set())
+            for timer, (_, event) in self._waiters.items()
+        )
+
+    async def run_until(self, end: float, poll: float = 0.0005):
+        """يقدّم الوقت حتى end، كل خطوة بعد أن تنام كل المهام المشاركة (قراءات القاعدة حقيقية)."""
+        while True:
+            while not self._idle():
+                await asyncio.sleep(poll)
+            wake_times = [wake_at for wake_at, _ in self._waiters.values() if wake_at is not None]
+            if not wake_times or min(wake_times) > end:
+                self.now = max(self.now, end)
+                return
+            self.now = max(self.now, min(wake_times))
+            for timer, (wake_at, _) in self._waiters.items():
+                if wake_at is not None and wake_at <= self.now:
+                    timer.set_result(None)
@@ -0,0 +1,129 @@
+"""إعدادات البوت.
+
+Config.from_env يقرأ متغيرات البيئة (و .env) مرة واحدة؛ ويمكن بناء Config
+مباشرة لتشغيل نسخة مضمّنة أو أكثر من نسخة في نفس العملية بدون متغيرات بيئة.
+"""
+import os
+from dataclasses import dataclass, field
+
+from .formatting import parse_thresholds
+
+
+@dataclass
+class Config:
+    bot_token: str
+    owner_id: int
+    # 🟢 معرف المجموعة/القناة الافتراضية للتنبيهات (تُضاف كمشترك إذا لم يوجد أي اشتراك)
+    target_chat_id: int = None
+    # اللعبة التي تديرها أوامر هذا البوت (سيرفراتها معرّفة في جدول server_offsets)
+    game: str = "genshin"
+    db_path: str = "genshin_bot.db"
+    db_readers: int = 4
+    # خادم Bot API محلي (telegram-bot-api) أو خادم وهمي لاختبارات الحمل
+    telegram_api_url: str = None
+
+    slow_handler_ms: int = 1000
+    # 🟢 حالات التحديث تُحفظ في القاعدة وتنتهي بعد fsm_ttl ثانية
+    # fsm_lru_size=0 عند تشغيل عدة نسخ خلف موزع حمل، حتى تُقرأ الحالة دائماً من القاعدة المشتركة
+    fsm_ttl: int = 86400
+    fsm_lru_size: int = 1024
+    throttle_chat_limits: str = "show=10/60,paging=30/60,help=3/60,default=20/60"
+    throttle_user_limits: str = "show=5/60,paging=20/60,inline=30/60,help=2/60,default=10/60"
+    throttle_lru_size: int = 10000
+
+    # عدد الأحداث في كل صفحة من قائمة الأحداث
+    events_page_size: int = 10
+    # 🟢 عتبات التنبيه بالثواني من الأكبر للأصغر (تنبيه الانتهاء يُرسل دائماً بالإضافة إليها)
+    alert_thresholds: list = field(default_factory=lambda: [3600])
+    # عدد المحادثات التي نرسل لها بالتوازي (الحد العام لـ Telegram يضبطه send_limiter)
+    delivery_concurrency: int = 20
+    # الرد مرة واحدة على الطلبات المتكررة في نفس المجموعة خلال هذه المدة (0 = معطل)
+    reply_burst_window: float = 0
+
+    live_granularity: int = 60
+    # إذا كان أقرب موعد أبعد من هذا نعرض الوقت بالساعات بدلاً من الدقائق
+    live_coarse_after: int = 2 * 86400
+    # حد عام لتعديلات الرسائل الحية (تعديل/ثانية) حتى لا تزاحم التنبيهات
+    live_edit_rate: float = 5
+    inline_granularity: int = 60
+    # 🟢 الرد على الأقسام ببطاقة مرسومة (يتطلب Pillow)
+    card_images: bool = False
+    card_font: str = None
+
+    compact_interval: int = 6 * 3600
+    vacuum_pages: int = 2000
+    backup_dir: str = "backups"
+    backup_keep: int = 7
+    # 0 يعطل النسخ الدوري ويبقى /backup متاحاً
+    backup_interval: int = 24 * 3600
+    backup_pages: int = 256
+
+    # None = اسم الجهاز ورقم العملية ورقم النسخة داخل العملية
+    instance_id: str = None
+    lease_ttl: float = 15
+    lease_heartbeat: float = 5
+
+    # نقطة Prometheus اختيارية (محلياً فقط افتراضياً)
+    metrics_port: int = None
+    metrics_host: str = "127.0.0.1"
+    # webhook_url: العنوان العام (مثال https://example.com)؛ بدونه لا نسجل webhook لدى Telegram
+    webhook_url: str = None
+    webhook_path: str = "/webhook"
+    # webhook_secret مطلوب ما لم يكن webhook_host عنوان loopback (خلف proxy محلي مثلاً):
+    # بدونه يقبل الخادم أي POST، ومنها تحديثات مزيفة باسم المالك
+    webhook_secret: str = None
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+
+    @classmethod
+    def from_env(cls, environ=None):
+        if environ is None:
+            from dotenv import load_dotenv
+            load_dotenv()
+            environ = os.environ
+        env = environ.get
+
+        def optional_int(name):
+            return int(env(name)) if env(name) else None
+
+        return cls(
+            bot_token=env("BOT_TOKEN"),
+            owner_id=int(env("OWNER_ID")),
+            target_chat_id=optional_int("TARGET_CHAT_ID"),
+            game=env("GAME", "genshin"),
+            db_path=env("DB_PATH", "genshin_bot.db"),
+            telegram_api_url=env("TELEGRAM_API_URL"),
+            slow_handler_ms=int(env("SLOW_HANDLER_MS", "1000")),
+            fsm_ttl=int(env("FSM_TTL", "86400")),
+            fsm_lru_size=int(env("FSM_LRU_SIZE", "1024")),
+            throttle_chat_limits=env("THROTTLE_CHAT_LIMITS", cls.throttle_chat_limits),
+            throttle_user_limits=env("THROTTLE_USER_LIMITS", cls.throttle_user_limits),
+            throttle_lru_size=int(env("THROTTLE_LRU_SIZE", "10000")),
+            events_page_size=int(env("EVENTS_PAGE_SIZE", "10")),
+            # مثال: ALERT_THRESHOLDS=24h,1h,10m
+            alert_thresholds=parse_thresholds(env("ALERT_THRESHOLDS", "1h")),
+            delivery_concurrency=int(env("DELIVERY_CONCURRENCY", "20")),
+            reply_burst_window=float(env("REPLY_BURST_WINDOW", "0")),
+            live_granularity=int(env("LIVE_GRANULARITY", "60")),
+            live_coarse_after=int(env("LIVE_COARSE_AFTER", str(2 * 86400))),
+            live_edit_rate=float(env("LIVE_EDIT_RATE", "5")),
+            inline_granularity=int(env("INLINE_GRANULARITY", "60")),
+            card_images=env("CARD_IMAGES") == "1",
+            card_font=env("CARD_FONT"),
+            compact_interval=int(env("COMPACT_INTERVAL", str(6 * 3600))),
+            vacuum_pages=int(env("VACUUM_PAGES", "2000")),
+            backup_dir=env("BACKUP_DIR", "backups"),
+            backup_keep=int(env("BACKUP_KEEP", "7")),
+            backup_interval=int(env("BACKUP_INTERVAL", str(24 * 3600))),
+            backup_pages=int(env("BACKUP_PAGES", "256")),
+            instance_id=env("INSTANCE_ID") or None,
+            lease_ttl=float(env("LEASE_TTL", "15")),
+            lease_heartbeat=float(env("LEASE_HEARTBEAT", "5")),
+            metrics_port=optional_int("METRICS_PORT"),
+            metrics_host=env("METRICS_HOST", "127.0.0.1"),
+            webhook_url=env("WEBHOOK_URL"),
+            webhook_path=env("WEBHOOK_PATH", "/webhook"),
+            webhook_secret=env("WEBHOOK_SECRET"),
+            webhook_host=env("WEBHOOK_HOST", "0.0.0.0"),
+            webhook_port=int(env("WEBHOOK_PORT", "8080")),
+        )
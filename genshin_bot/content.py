@@ -0,0 +1,227 @@
+"""قراءة المحتوى وكتابته: دوال الكاش، ودوال المعاملات (داخل db.transaction)،
+والاستيراد والتصدير.
+"""
+from functools import partial
+
+from .formatting import arabic_section_titles, format_end_datetime, parse_end_datetime
+
+# --- Read Cache Loaders ---
+# هذه الجداول تتغير مرات قليلة في كل تحديث للعبة لكنها تُقرأ آلاف المرات،
+# لذلك نحتفظ بها في الذاكرة ونبطلها من مسارات الكتابة فقط.
+
+async def load_admins(app):
+    return {row[0] for row in await app.db.fetchall("SELECT user_id FROM admins")}
+
+async def load_regions(app, game: str):
+    # [(server, offset_hours, label), ...] بترتيب العرض
+    return await app.db.fetchall("SELECT server, offset_hours, label FROM server_offsets WHERE game = ? ORDER BY position, server", (game,))
+
+async def load_section(app, section: str):
+    row = await app.db.fetchone("SELECT id, title, name, image_file_id FROM content WHERE game = ? AND section = ?", (app.config.game, section))
+    if not row:
+        return None
+    deadlines = await app.db.fetchall("""
+        SELECT d.region, d.deadline FROM content_deadlines d
+        LEFT JOIN server_offsets o ON o.game = d.game AND o.server = d.region
+        WHERE d.content_id = ?
+        ORDER BY o.position, d.region
+    """, (row[0],))
+    return (*row, deadlines)
+
+async def load_events(app, after=None, before=None):
+    """صفحة من الأحداث بترتيب أقرب موعد (keyset على (deadline, content_id)).
+
+    يرجع ([(content_id, name, deadline), ...], has_prev, has_next).
+    للحدث موعد واحد فقط (بتوقيت أول سيرفر).
+    """
+    game, page_size = app.config.game, app.config.events_page_size
+    query = """
+        SELECT d.content_id, c.name, d.deadline FROM content_deadlines d
+        JOIN content c ON c.id = d.content_id
+        WHERE d.game = ? AND c.section = 'events' {where}
+        ORDER BY d.deadline {order}, d.content_id {order} LIMIT ?
+    """
+    if before:
+        rows = await app.db.fetchall(
+            query.format(where="AND (d.deadline, d.content_id) < (?, ?)", order="DESC"),
+            (game, *before, page_size + 1)
+        )
+        return rows[:page_size][::-1], len(rows) > page_size, True
+    if after:
+        rows = await app.db.fetchall(
+            query.format(where="AND (d.deadline, d.content_id) > (?, ?)", order="ASC"),
+            (game, *after, page_size + 1)
+        )
+        return rows[:page_size], True, len(rows) > page_size
+    rows = await app.db.fetchall(query.format(where="", order="ASC"), (game, page_size + 1))
+    return rows[:page_size], False, len(rows) > page_size
+
+async def load_subscriptions(app):
+    # [(chat_id, sections أو None, regions أو None), ...]
+    rows = await app.db.fetchall("SELECT chat_id, sections, regions FROM subscriptions")
+    return [
+        (chat_id, set(sections.split(",")) if sections else None, set(regions.split(",")) if regions else None)
+        for chat_id, sections, regions in rows
+    ]
+
+def register_loaders(app):
+    app.cache.register('admins', partial(load_admins, app))
+    app.cache.register('subscriptions', partial(load_subscriptions, app))
+    app.cache.register('regions', partial(load_regions, app))
+    app.cache.register('section', partial(load_section, app))
+    app.cache.register('events', partial(load_events, app))
+
+# --- Writes (inside db.transaction) ---
+
+def delete_content(conn, content_ids):
+    """يحذف المحتوى مع مواعيده وسجلات تنبيهاته (داخل db.transaction)."""
+    params = [(content_id,) for content_id in content_ids]
+    conn.executemany("DELETE FROM content WHERE id = ?", params)
+    conn.executemany("DELETE FROM content_deadlines WHERE content_id = ?", params)
+    conn.executemany("DELETE FROM sent_alerts WHERE content_id = ?", params)
+
+def archive_content(conn, content_ids, now_ts: int):
+    """ينقل المحتوى المنتهي إلى content_history ثم يحذفه (داخل db.transaction)."""
+    conn.executemany("""
+        INSERT INTO content_history (content_id, game, section, title, name, image_file_id, deadlines, ended_at, archived_at)
+        SELECT c.id, c.game, c.section, c.title, c.name, c.image_file_id,
+               json_group_object(d.region, d.deadline), MAX(d.deadline), ?
+        FROM content c JOIN content_deadlines d ON d.content_id = c.id
+        WHERE c.id = ?
+        GROUP BY c.id
+    """, [(now_ts, content_id) for content_id in content_ids])
+    delete_content(conn, content_ids)
+
+def save_section(conn, game: str, section: str, title: str, name: str, file_id, deadlines):
+    """ينشئ محتوى القسم أو يستبدله مع مواعيده (داخل db.transaction).
+
+    file_id = None يبقي الصورة الحالية.
+    """
+    existing_row = conn.execute("SELECT id FROM content WHERE game = ? AND section = ?", (game, section)).fetchone()
+
+    if existing_row:
+        content_id = existing_row[0]
+        conn.execute("""
+            UPDATE content SET
+                title=?,
+                name=?,
+                image_file_id=COALESCE(?, image_file_id)
+            WHERE id=?
+        """, (title, name, file_id, content_id))
+        conn.execute("DELETE FROM content_deadlines WHERE content_id = ?", (content_id,))
+        # 🟢 عند التحديث، احذف سجلات التنبيهات القديمة ليتم إرسالها من جديد
+        conn.execute("DELETE FROM sent_alerts WHERE content_id = ?", (content_id,))
+    else:
+        content_id = conn.execute("""
+            INSERT INTO content (game, section, title, name, image_file_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (game, section, title, name, file_id)).lastrowid
+
+    conn.executemany("""
+        INSERT INTO content_deadlines (content_id, game, region, deadline)
+        VALUES (?, ?, ?, ?)
+    """, [(content_id, game, server, deadline) for server, deadline in deadlines])
+
+# --- Bulk Import / Export ---
+
+IMPORT_MAX_BYTES = 1024 * 1024
+
+async def prepare_import(app, doc: dict):
+    """يتحقق من كل العناصر قبل الكتابة؛ يرجع (sections, events, errors)."""
+    regions = await app.cache.get('regions', app.config.game)
+    region_names = {server for server, _, _ in regions}
+    sections, events, errors = [], [], []
+
+    seen = set()
+    for number, item in enumerate(doc["sections"], start=1):
+        if not isinstance(item, dict):
+            errors.append(f"قسم {number}: عنصر غير صالح")
+            continue
+        section = str(item.get("section") or "").lower()
+        if section not in arabic_section_titles:
+            errors.append(f"قسم {number}: قسم غير معروف '{section}'")
+            continue
+        if section in seen:
+            errors.append(f"قسم {number}: القسم {section} مكرر")
+            continue
+        seen.add(section)
+
+        times = item.get("times") or {}
+        unknown = set(times) - region_names if isinstance(times, dict) else set()
+        if not isinstance(times, dict) or unknown:
+            errors.append(f"{section}: سيرفرات غير معروفة {', '.join(sorted(unknown))}")
+            continue
+        deadlines = []
+        for server, offset_hours, label in regions:
+            end_time_utc = parse_end_datetime(str(times.get(server, "")), offset_hours=offset_hours)
+            if not end_time_utc:
+                errors.append(f"{section}: وقت غير صحيح لسيرفر {label or server}")
+                break
+            deadlines.append((server, int(end_time_utc.timestamp())))
+        else:
+            sections.append((
+                section, str(item.get("title") or ""), str(item.get("name") or ""),
+                item.get("image_file_id") or None, deadlines
+            ))
+
+    for number, item in enumerate(doc["events"], start=1):
+        name = str(item.get("name") or "").strip() if isinstance(item, dict) else ""
+        if not name:
+            errors.append(f"حدث {number}: الاسم فارغ")
+            continue
+        if not regions:
+            errors.append("لا توجد سيرفرات معرّفة لهذه اللعبة.")
+            break
+        region, offset_hours, _ = regions[0]
+        end_time_utc = parse_end_datetime(str(item.get("time") or ""), offset_hours=offset_hours)
+        if not end_time_utc:
+            errors.append(f"{name}: وقت غير صحيح")
+            continue
+        events.append((name, region, int(end_time_utc.timestamp())))
+
+    return sections, events, errors
+
+def apply_import(conn, game: str, sections, events):
+    for section, title, name, file_id, deadlines in sections:
+        save_section(conn, game, section, title, name, file_id, deadlines)
+    for name, region, deadline in events:
+        # الحدث بنفس الاسم يُحدّث موعده بدلاً من التكرار، فإعادة استيراد التصدير آمنة
+        existing = conn.execute("SELECT id FROM content WHERE game = ? AND section = 'events' AND name = ?", (game, name)).fetchone()
+        if existing:
+            content_id = existing[0]
+            conn.execute("DELETE FROM content_deadlines WHERE content_id = ?", (content_id,))
+        else:
+            content_id = conn.execute("INSERT INTO content (game, section, name) VALUES (?, ?, ?)", (game, 'events', name)).lastrowid
+        conn.execute("""
+            INSERT INTO content_deadlines (content_id, game, region, deadline)
+            VALUES (?, ?, ?, ?)
+        """, (content_id, game, region, deadline))
+
+async def export_content(app) -> dict:
+    regions = await app.cache.get('regions', app.config.game)
+    offsets = {server: offset_hours for server, offset_hours, _ in regions}
+    rows = await app.db.fetchall("""
+        SELECT c.id, c.section, c.title, c.name, c.image_file_id, d.region, d.deadline
+        FROM content c JOIN content_deadlines d ON d.content_id = c.id
+        WHERE c.game = ? ORDER BY c.id
+    """, (app.config.game,))
+
+    doc = {"sections": [], "events": []}
+    items = {}
+    for content_id, section, title, name, file_id, region, deadline in rows:
+        if section == 'events':
+            # الأحداث بتوقيت أول سيرفر؛ نأخذ أقرب موعد كما في قائمة الأحداث
+            if content_id not in items:
+                items[content_id] = {"name": name, "deadline": deadline}
+                doc["events"].append(items[content_id])
+            items[content_id]["deadline"] = min(items[content_id]["deadline"], deadline)
+            continue
+        if content_id not in items:
+            items[content_id] = {"section": section, "title": title, "name": name, "image_file_id": file_id, "times": {}}
+            doc["sections"].append(items[content_id])
+        items[content_id]["times"][region] = format_end_datetime(deadline, offsets.get(region, 0))
+
+    first_offset = regions[0][1] if regions else 0
+    for event in doc["events"]:
+        event["time"] = format_end_datetime(event.pop("deadline"), first_offset)
+    return doc
@@ -0,0 +1,226 @@
+"""طبقة الوصول إلى قاعدة البيانات (SQLite) بدون حجب حلقة الأحداث.
+
+القراءات تُنفّذ على مجموعة خيوط (thread pool) لكل خيط فيها اتصاله الخاص،
+والكتابات تمر عبر خيط كتابة واحد يجمع كل الكتابات المتزامنة في معاملة
+واحدة (group commit) بحيث يكلّف الـ fsync مرة واحدة لكل دفعة.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+WriteResult = namedtuple("WriteResult", "lastrowid rowcount")
+
+
+class Database:
+    def __init__(self, path: str, readers: int = 4, on_query=None):
+        self.path = path
+        # on_query(kind, seconds): خطاف اختياري للقياسات بعد كل استعلام
+        self.on_query = on_query
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._read_pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        self._pending = []
+        self._flushing = False
+
+    # --- Connections ---
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: نتحكم بالمعاملات يدوياً (BEGIN/COMMIT)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        self._read_pool.shutdown(wait=True)
+        self._write_pool.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    # --- Reads ---
+
+    def _fetchone(self, sql, params):
+        return self._connection().execute(sql, params).fetchone()
+
+    def _fetchall(self, sql, params):
+        return self._connection().execute(sql, params).fetchall()
+
+    async def _timed(self, kind, pool, func, *args):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        finally:
+            if self.on_query is not None:
+                self.on_query(kind, time.perf_counter() - started)
+
+    async def fetchone(self, sql: str, params=()):
+        return await self._timed("read", self._read_pool, self._fetchone, sql, params)
+
+    async def fetchall(self, sql: str, params=()):
+        return await self._timed("read", self._read_pool, self._fetchall, sql, params)
+
+    # --- Writes ---
+
+    async def execute(self, sql: str, params=()) -> WriteResult:
+        def op(conn):
+            cur = conn.execute(sql, params)
+            return WriteResult(cur.lastrowid, cur.rowcount)
+        return await self.transaction(op)
+
+    async def executemany(self, sql: str, seq_of_params) -> WriteResult:
+        seq_of_params = list(seq_of_params)
+
+        def op(conn):
+            cur = conn.executemany(sql, seq_of_params)
+            return WriteResult(cur.lastrowid, cur.rowcount)
+        return await self.transaction(op)
+
+    async def transaction(self, func):
+        """ينفّذ func(conn) ذرّياً على خيط الكتابة ويعيد نتيجتها.
+
+        يجب ألا تستدعي func أوامر COMMIT/ROLLBACK بنفسها.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((func, future))
+        if not self._flushing:
+            self._flushing = True
+            loop.create_task(self._flush())
+        started = time.perf_counter()
+        try:
+            return await future
+        finally:
+            if self.on_query is not None:
+                self.on_query("write", time.perf_counter() - started)
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        try:
+            # الكتابات التي تصل أثناء تنفيذ دفعة تُجمع في الدفعة التالية
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    outcomes = await loop.run_in_executor(self._write_pool, self._commit_batch, batch)
+                except Exception as e:
+                    outcomes = [(e, None)] * len(batch)
+                for (_, future), (error, value) in zip(batch, outcomes):
+                    if future.done():
+                        continue
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(value)
+        finally:
+            self._flushing = False
+
+    def _commit_batch(self, batch):
+        conn = self._connection()
+        outcomes = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for func, _ in batch:
+                # كل عملية داخل savepoint حتى لا يُفشل خطأ واحد بقية الدفعة
+                conn.execute("SAVEPOINT op")
+                try:
+                    value = func(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    outcomes.append((e, None))
+                else:
+                    conn.execute("RELEASE op")
+                    outcomes.append((None, value))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return outcomes
+
+    # --- Backup / Restore ---
+
+    def _backup(self, dest_path: str, pages: int, pause: float):
+        # اتصال قراءة مستقل: في وضع WAL لا يحجب خيط الكتابة أثناء النسخ
+        src = sqlite3.connect(self.path)
+        dst = sqlite3.connect(dest_path)
+        try:
+            # قراءة مفتوحة طوال النسخ: لقطة WAL ثابتة، وإلا تعيد كل كتابة النسخ من البداية
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            src.backup(dst, pages=pages, progress=lambda *_: time.sleep(pause))
+            # النسخة ملف واحد مستقل (بدون -wal/-shm عند فتحها لاحقاً)
+            dst.execute("PRAGMA journal_mode=DELETE")
+            check = dst.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            dst.close()
+            src.close()
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"Backup failed quick_check: {check}")
+
+    async def backup(self, dest_path: str, pages: int = 256, pause: float = 0.005):
+        """نسخة احتياطية أثناء العمل (SQLite online backup) على دفعات من pages صفحة.
+
+        تعمل خارج حلقة الأحداث وخارج خيط الكتابة؛ pause بين الدفعات يخفف ضغط القرص.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._backup, dest_path, pages, pause)
+
+    def _restore(self, src_path: str, max_version):
+        src = sqlite3.connect(f"file:{src_path}?mode=ro", uri=True)
+        try:
+            check = src.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"Snapshot failed quick_check: {check}")
+            version = src.execute("PRAGMA user_version").fetchone()[0]
+            if max_version is not None and version > max_version:
+                raise sqlite3.DatabaseError(f"Snapshot schema version {version} is newer than {max_version}")
+            # باتصال خيط الكتابة: الكتابات الأخرى تنتظر حتى تكتمل الاستعادة
+            src.backup(self._connection())
+        finally:
+            src.close()
+
+    async def restore(self, src_path: str, max_version: int = None):
+        """يستبدل محتوى القاعدة بنسخة احتياطية (بعد التحقق منها)."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._write_pool, self._restore, src_path, max_version)
+
+    def enable_incremental_vacuum(self) -> bool:
+        """يفعّل auto_vacuum=INCREMENTAL (قبل تشغيل حلقة الأحداث).
+
+        على قاعدة موجودة يتطلب ذلك VACUUM كاملاً مرة واحدة، لذا يرجع True إذا حصل.
+        """
+        def op():
+            conn = self._connection()
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+        return self._write_pool.submit(op).result()
+
+    def read_sync(self, func):
+        """ينفّذ func(conn) بدون معاملة كتابة (قبل تشغيل حلقة الأحداث)."""
+        return self._write_pool.submit(lambda: func(self._connection())).result()
+
+    def run_sync(self, func):
+        """نسخة متزامنة من transaction لاستخدامها قبل تشغيل حلقة الأحداث."""
+        def op():
+            error, value = self._commit_batch([(func, None)])[0]
+            if error is not None:
+                raise error
+            return value
+        return self._write_pool.submit(op).result()
@@ -0,0 +1,105 @@
+"""دوال الوقت والنصوص (بدون aiogram ولا قاعدة بيانات، فتُستورد بسرعة)."""
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+
+arabic_section_titles = {
+    'abyss': 'الأبِس',
+    'stygian': 'ستيجيان',
+    'theater': 'المسرح',
+    'banner': 'البنر'
+}
+
+def time_left_str(end_ts: int, now_ts: int, granularity: int = 1) -> str:
+    # المواعيد ثواني UTC (epoch) كما هي مخزنة في القاعدة
+    total_seconds = int(end_ts - now_ts)
+    if total_seconds <= 0:
+        return "انتهى."
+    # granularity: 60 = بالدقائق، 3600 = بالساعات (تقريب للأعلى حتى لا يظهر صفر قبل الانتهاء)
+    if granularity > 1:
+        total_seconds = -(-total_seconds // granularity) * granularity
+
+    days = total_seconds // 86400
+    hours = (total_seconds % 86400) // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+
+    parts = [f"{days} يوم"]
+    if granularity < 86400:
+        parts.append(f"{hours} ساعة")
+    if granularity < 3600:
+        parts.append(f"{minutes} دقيقة")
+    if granularity < 60:
+        parts.append(f"{seconds} ثانية")
+    return " و ".join(parts)
+
+def next_text_change(deadlines, now_ts: int, granularity: int):
+    """أقرب لحظة يتغير فيها ناتج time_left_str لأي من المواعيد (أو None)."""
+    times = []
+    for end_ts in deadlines:
+        total_seconds = end_ts - now_ts
+        if total_seconds > 0:
+            steps = -(-total_seconds // granularity)
+            times.append(end_ts - (steps - 1) * granularity)
+    return min(times) if times else None
+
+def parse_end_datetime(date_time_str: str, offset_hours: int = 0):
+    try:
+        # Create a timezone with the specified offset
+        tz = timezone(timedelta(hours=offset_hours))
+        # Parse the string and attach the timezone
+        end_time = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz)
+        # Convert it to UTC for consistent comparison
+        return end_time.astimezone(timezone.utc)
+    except:
+        return None
+
+def format_end_datetime(end_ts: int, offset_hours: int = 0) -> str:
+    """عكس parse_end_datetime: الموعد بتوقيت السيرفر بنفس صيغة الإدخال."""
+    tz = timezone(timedelta(hours=offset_hours))
+    return datetime.fromtimestamp(end_ts, tz).strftime("%Y-%m-%d %H:%M:%S")
+
+# 🟢 عتبات التنبيه قابلة للتعديل عبر ALERT_THRESHOLDS (مثال: 24h,1h,10m)
+# تنبيه الانتهاء (expired) يُرسل دائماً بالإضافة إلى هذه العتبات.
+def parse_thresholds(spec: str) -> list:
+    units = {'d': 86400, 'h': 3600, 'm': 60, 's': 1}
+    thresholds = set()
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        try:
+            seconds = int(part[:-1]) * units[part[-1]]
+        except (ValueError, KeyError):
+            logging.warning(f"Ignoring invalid alert threshold: {part}")
+            continue
+        if seconds > 0:
+            thresholds.add(seconds)
+    return sorted(thresholds, reverse=True)
+
+def alert_type_for(threshold: int) -> str:
+    # نحافظ على الأسماء القديمة حتى لا تتكرر التنبيهات المسجلة مسبقاً في sent_alerts
+    if threshold == 0:
+        return 'expired'
+    if threshold == 3600:
+        return '1_hour_remaining'
+    return f"{threshold}s_remaining"
+
+def duration_ar(seconds: int) -> str:
+    if seconds == 3600:
+        return "ساعة واحدة"
+    parts = []
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes = rest // 60
+    if days:
+        parts.append(f"{days} يوم")
+    if hours:
+        parts.append(f"{hours} ساعة")
+    if minutes:
+        parts.append(f"{minutes} دقيقة")
+    return " و ".join(parts) or f"{seconds} ثانية"
+
+def escape_markdown(text: str) -> str:
+    """يهرّب رموز Markdown (parse_mode="Markdown") في نص أدخله مشرف، مثل العناوين."""
+    return re.sub(r"([_*`\[])", r"\\\1", text)
@@ -0,0 +1,107 @@
+"""تخزين حالات FSM في قاعدة بيانات البوت بدلاً من MemoryStorage.
+
+الحالات تبقى بعد إعادة التشغيل، وأمامها LRU صغير في الذاكرة للقراءات
+المتكررة. الجلسات المتروكة تنتهي بعد ttl ثانية وتُحذف بمهمة خلفية.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from .db import Database
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, db: Database, ttl: int = 86400, lru_size: int = 1024):
+        self.db = db
+        self.ttl = ttl
+        self.lru_size = lru_size
+        # key -> (state, data_json, updated_at)؛ نحفظ JSON حتى لا يعدّل المعالج نسخة الكاش
+        self._lru = OrderedDict()
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return ":".join(str(part) for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id or "",
+            key.business_connection_id or "", key.destiny,
+        ))
+
+    def _remember(self, key: str, record):
+        self._lru[key] = record
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    async def _load(self, key: str):
+        record = self._lru.get(key)
+        if record is None:
+            row = await self.db.fetchone("SELECT state, data, updated_at FROM fsm_state WHERE key = ?", (key,))
+            record = row if row else (None, "{}", 0)
+            self._remember(key, record)
+        else:
+            self._lru.move_to_end(key)
+
+        state, data_json, updated_at = record
+        if updated_at and updated_at < time.time() - self.ttl:
+            return None, {}
+        return state, json.loads(data_json)
+
+    async def _save(self, key: str, state: Optional[str], data: Dict[str, Any]):
+        if state is None and not data:
+            self._remember(key, (None, "{}", 0))
+            await self.db.execute("DELETE FROM fsm_state WHERE key = ?", (key,))
+            return
+
+        now = int(time.time())
+        data_json = json.dumps(data, ensure_ascii=False)
+        self._remember(key, (state, data_json, now))
+        await self.db.execute("""
+            INSERT INTO fsm_state (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+        """, (key, state, data_json, now))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key = self._key(key)
+        _, data = await self._load(storage_key)
+        await self._save(storage_key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(self._key(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        storage_key = self._key(key)
+        state, _ = await self._load(storage_key)
+        await self._save(storage_key, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(self._key(key))
+        return data
+
+    async def close(self) -> None:
+        self._lru.clear()
+
+    # --- Expiry ---
+
+    async def sweep(self) -> int:
+        cutoff = int(time.time()) - self.ttl
+        for key in [k for k, (_, _, updated_at) in self._lru.items() if updated_at and updated_at < cutoff]:
+            del self._lru[key]
+        result = await self.db.execute("DELETE FROM fsm_state WHERE updated_at < ?", (cutoff,))
+        return result.rowcount
+
+    async def run_sweeper(self, interval: int = 600):
+        """المهمة الخلفية لحذف الجلسات المتروكة."""
+        while True:
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logging.info(f"Expired {removed} abandoned FSM sessions")
+            except Exception as e:
+                logging.error(f"Error in FSM sweeper task: {e}")
+            await asyncio.sleep(interval)
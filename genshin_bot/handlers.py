@@ -0,0 +1,901 @@
+"""معالجات الأوامر والرسائل.
+
+المعالجات تُجمع عند استيراد الملف بدون أي تهيئة، وتُبنى في Router جديد لكل
+نسخة من البوت (build_router)، وتصلها نسختها عبر المعامل app.
+"""
+import logging
+import os
+import re
+
+from aiogram import F, Router, types
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from . import bulk
+from .alerts import drop_subscription
+from .content import IMPORT_MAX_BYTES, apply_import, delete_content, export_content, prepare_import, save_section
+from .formatting import arabic_section_titles, escape_markdown, format_end_datetime, parse_end_datetime
+from .live import build_live
+from .maintenance import create_backup, list_backups, restore_backup
+from .rendering import (
+    build_events_page, build_inline_results, build_section_caption, inline_keywords,
+    render_once, reply_coalesced, send_section_card,
+)
+
+# (observer, handler, filters) بترتيب التسجيل
+handlers = []
+
+def on(observer: str, *filters):
+    """يسجّل المعالج لـ dp.<observer>(*filters) في كل Router يُبنى لاحقاً."""
+    def decorator(handler):
+        handlers.append((observer, handler, filters))
+        return handler
+    return decorator
+
+def build_router() -> Router:
+    # Router يرتبط بـ Dispatcher واحد فقط، لذا لكل نسخة Router خاص بها
+    router = Router(name="genshin_bot")
+    for observer, handler, filters in handlers:
+        getattr(router, observer).register(handler, *filters)
+    return router
+
+# 🟢 حدود التكرار لكل محادثة ولكل مستخدم حسب مجموعة الأوامر (المشرفون مستثنون)
+throttle_groups = {
+    'cmd_show_content_single': 'show',
+    'cmd_show_events': 'show',
+    'cmd_history': 'show',
+    'cb_events_page': 'paging',
+    'inline_countdowns': 'inline',
+    'cmd_start': 'help',
+    'cmd_custom_commands': 'help',
+}
+
+# --- FSM States ---
+
+class UpdateContent(StatesGroup):
+    waiting_for_title_and_name = State()
+    waiting_for_title = State()
+    waiting_for_event_text = State()
+    waiting_for_region_time = State()
+    waiting_for_photo = State()
+
+# --- Inline Mode ---
+
+@on("inline_query")
+async def inline_countdowns(query: types.InlineQuery, app):
+    now_ts = int(app.clock.time())
+    cached = app.inline_results.get('all')
+    if cached is None or cached[0] <= now_ts:
+        cached = app.inline_results['all'] = await build_inline_results(app, now_ts)
+    valid_until, results = cached
+
+    text = query.query.strip().lower()
+    matching = [
+        result for section, result in results
+        if not text or any(text in keyword or keyword in text for keyword in inline_keywords[section])
+    ]
+    await query.answer(matching, cache_time=max(1, min(valid_until - now_ts, app.config.inline_granularity)), is_personal=False)
+
+# --- Command Handlers ---
+
+# Unified handler for setting commands
+@on("message", Command(
+    'setbanner',
+    'setbanner_ar',
+    'setabyss',
+    'setabyss_ar',
+    'setstygian',
+    'setstygian_ar',
+    'settheater',
+    'settheater_ar'
+))
+async def cmd_start_update_single_title_only(message: types.Message, state: FSMContext, command: Command, app):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية تعديل المحتوى.")
+        return
+
+    command_text = command.command
+    await state.update_data(section=command_text.replace("set", "").replace("_ar", ""))
+
+    # 🟢 نغيّر الحالة قبل الرد: رسالة المستخدم التالية قد تُعالج قبل أن ينتهي هذا المعالج
+    if 'banner' in command_text:
+        await state.set_state(UpdateContent.waiting_for_title_and_name)
+        await message.reply(
+            "أرسل البيانات بهذا الشكل:\n"
+            "عنوان المحتوى ; اسم الحدث\n"
+            "مثال:\n"
+            "بنرات 5.8 النصف الاول ; سيتلالي + اينيفيا\n"
+        )
+    else:
+        await state.set_state(UpdateContent.waiting_for_title)
+        await message.reply(
+            "أرسل البيانات بهذا الشكل:\n"
+            "عنوان المحتوى\n"
+            "مثال:\n"
+            "أبس 5.8\n"
+        )
+
+@on("message", Command('setevents', 'setevents_ar'))
+async def cmd_start_update_events(message: types.Message, state: FSMContext, app):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية تعديل المحتوى.")
+        return
+    await state.update_data(section='events')
+    await state.set_state(UpdateContent.waiting_for_event_text)
+    await message.reply(
+        "أرسل البيانات بهذا الشكل لإضافة حدث جديد:\n"
+        "اسم الحدث ; YYYY-MM-DD HH:MM:SS\n"
+        "مثال:\n"
+        "حدث جديد ; 2025-10-25 15:30:00\n"
+    )
+
+@on("message", UpdateContent.waiting_for_title, F.content_type == types.ContentType.TEXT)
+async def process_title(message: types.Message, state: FSMContext, app):
+    title = message.text.strip()
+    if not title:
+        await message.reply("❌ العنوان لا يمكن أن يكون فارغًا. يرجى إرسال: عنوان المحتوى")
+        return
+
+    await state.update_data(title=title, name="", region_times={})
+    await ask_next_region_time(app, message, state)
+
+@on("message", UpdateContent.waiting_for_title_and_name, F.content_type == types.ContentType.TEXT)
+async def process_title_and_name(message: types.Message, state: FSMContext, app):
+    text = message.text
+    parts = [p.strip() for p in text.split(";", 1)]
+
+    if len(parts) < 2:
+        await message.reply("❌ الخطأ في الصيغة.\nالصيغة:\nعنوان المحتوى ; اسم الحدث")
+        return
+
+    title = parts[0]
+    name = parts[1]
+
+    await state.update_data(title=title, name=name, region_times={})
+    await ask_next_region_time(app, message, state)
+
+@on("message", UpdateContent.waiting_for_event_text, F.content_type == types.ContentType.TEXT)
+async def process_event_text(message: types.Message, state: FSMContext, app):
+    game = app.config.game
+    text = message.text
+    parts = [p.strip() for p in text.split(";", 1)]
+
+    if len(parts) < 2:
+        await message.reply("❌ الخطأ في الصيغة.\nالصيغة:\nاسم الحدث ; YYYY-MM-DD HH:MM:SS")
+        return
+
+    name = parts[0]
+    # وقت الحدث يُدخل بتوقيت أول سيرفر للعبة (آسيا في Genshin)
+    regions = await app.cache.get('regions', game)
+    if not regions:
+        await state.clear()
+        await message.reply("❌ لا توجد سيرفرات معرّفة لهذه اللعبة.")
+        return
+    region, offset_hours, _ = regions[0]
+    end_time_utc = parse_end_datetime(parts[1], offset_hours=offset_hours)
+    if not end_time_utc:
+        await message.reply("❌ تنسيق التاريخ والوقت غير صحيح. استخدم الصيغة `YYYY-MM-DD HH:MM:SS`.")
+        return
+
+    def save_event(conn):
+        content_id = conn.execute("INSERT INTO content (game, section, name) VALUES (?, ?, ?)", (game, 'events', name)).lastrowid
+        conn.execute("""
+            INSERT INTO content_deadlines (content_id, game, region, deadline)
+            VALUES (?, ?, ?, ?)
+        """, (content_id, game, region, int(end_time_utc.timestamp())))
+
+    await app.db.transaction(save_event)
+    app.invalidate_content('events')
+    app.reschedule_alerts()
+    await state.clear()
+    await message.reply(f"✅ تم إضافة حدث جديد بنجاح.")
+
+async def ask_next_region_time(app, message: types.Message, state: FSMContext):
+    """يطلب وقت الانتهاء للسيرفر التالي المعرّف للعبة، ثم الصورة بعد آخر سيرفر."""
+    data = await state.get_data()
+    region_times = data.get('region_times', {})
+    for server, _, label in await app.cache.get('regions', app.config.game):
+        if server not in region_times:
+            await state.set_state(UpdateContent.waiting_for_region_time)
+            await message.reply(f"يرجى إدخال وقت انتهاء سيرفر {label or server}: YYYY-MM-DD HH:MM:SS")
+            return
+    await state.set_state(UpdateContent.waiting_for_photo)
+    await message.reply("الآن أرسل صورة مرفقة للحدث.")
+
+@on("message", UpdateContent.waiting_for_region_time, F.content_type == types.ContentType.TEXT)
+async def process_region_time(message: types.Message, state: FSMContext, app):
+    data = await state.get_data()
+    region_times = data.get('region_times', {})
+    for server, _, _ in await app.cache.get('regions', app.config.game):
+        if server not in region_times:
+            # We will parse this time later in process_photo
+            region_times[server] = message.text
+            break
+    await state.update_data(region_times=region_times)
+    await ask_next_region_time(app, message, state)
+
+@on("message", UpdateContent.waiting_for_photo, F.content_type == types.ContentType.PHOTO)
+async def process_photo(message: types.Message, state: FSMContext, app):
+    data = await state.get_data()
+    section = data['section']
+    title = data.get('title', '')
+    name = data.get('name', '')
+
+    region_times = data.get('region_times', {})
+
+    # Parse and convert to UTC (epoch seconds) based on each server's offset
+    deadlines = []
+    for server, offset_hours, _ in await app.cache.get('regions', app.config.game):
+        end_time_utc = parse_end_datetime(region_times.get(server, ''), offset_hours=offset_hours)
+        if not end_time_utc:
+            await state.clear()
+            await message.reply("❌ تنسيق التاريخ والوقت غير صحيح في أحد السيرفرات. يرجى البدء من جديد.")
+            return
+        deadlines.append((server, int(end_time_utc.timestamp())))
+
+    photo = message.photo[-1]
+    file_id = photo.file_id
+
+    await app.db.transaction(lambda conn: save_section(conn, app.config.game, section, title, name, file_id, deadlines))
+    app.invalidate_content('section')
+    app.reschedule_alerts()
+
+    await state.clear()
+    await message.reply(f"✅ تم تحديث محتوى {section} بنجاح. **(سيتم تفعيل التنبيهات تلقائياً)**")
+
+@on("message", UpdateContent.waiting_for_photo, F.content_type != types.ContentType.PHOTO)
+async def process_not_photo(message: types.Message):
+    await message.reply("❌ الرجاء إرسال صورة فقط.")
+
+# Unified handler for showing content
+@on("message", Command('the_banner', 'banner', 'abyss', 'stygian', 'theater', 'spiral_abyss')) # Added 'the_banner' here
+@on("message", F.text.lower().in_(['التبنر', 'البنر', 'الابيس', 'ستيجيان', 'المسرح'])) # Added 'التبنر' here for the new command
+async def cmd_show_content_single(message: types.Message, app, command: Command = None):
+    section_map = {
+        'the_banner': 'banner', # Changed from 'banner' to 'the_banner'
+        'banner': 'banner', 'البنر': 'banner',
+        'abyss': 'abyss', 'الابيس': 'abyss',
+        'stygian': 'stygian', 'ستيجيان': 'stygian',
+        'theater': 'theater', 'المسرح': 'theater',
+        'spiral_abyss': 'abyss'
+    }
+
+    if command:
+        section_key = section_map.get(command.command)
+    else:
+        # Map user's text input to the correct section key
+        text_to_section_map = {
+            'التبنر': 'banner', # New mapping for 'التبنر'
+            'البنر': 'banner',
+            'الابيس': 'abyss',
+            'ستيجيان': 'stygian',
+            'المسرح': 'theater',
+        }
+        section_key = text_to_section_map.get(message.text.lower())
+
+    if not section_key:
+        return
+
+    async def send(message: types.Message):
+        if app.card_renderer is not None:
+            await send_section_card(app, message, section_key)
+            return
+        caption = await render_once(app, ('section', section_key), int(app.clock.time()), lambda now_ts: build_section_caption(app, section_key, now_ts))
+        if not caption:
+            await message.reply(f"لا يوجد محتوى مضاف لقسم {section_key}.")
+            return
+
+        text, file_id = caption
+        if file_id:
+            await message.reply_photo(photo=file_id, caption=text, parse_mode="Markdown")
+        else:
+            await message.reply(text, parse_mode="Markdown")
+
+    await reply_coalesced(app, message, section_key, send)
+
+# Unified handler for events
+@on("message", Command('events', 'event'))
+@on("message", F.text.lower().in_(['الاحداث']))
+async def cmd_show_events(message: types.Message, app):
+    # القراءة لا تكتب شيئاً؛ حذف الأحداث المنتهية تتولاه مهمة expire_events
+    async def send(message: types.Message):
+        page = await render_once(app, ('events', None, None), int(app.clock.time()), lambda now_ts: build_events_page(app, now_ts))
+        if not page:
+            await message.reply("لا يوجد أحداث مضافة حاليًا.")
+            return
+        text, markup = page
+        await message.reply(text, parse_mode="Markdown", reply_markup=markup)
+
+    await reply_coalesced(app, message, 'events', send)
+
+# Inline "next/prev" buttons of the events list: edit the same message
+@on("callback_query", F.data.startswith("ev:"))
+async def cb_events_page(callback: types.CallbackQuery, app):
+    try:
+        _, direction, deadline, content_id = callback.data.split(":")
+        cursor = (int(deadline), int(content_id))
+    except ValueError:
+        await callback.answer()
+        return
+    after, before = (cursor, None) if direction == "n" else (None, cursor)
+
+    page = await render_once(app, ('events', after, before), int(app.clock.time()), lambda now_ts: build_events_page(app, now_ts, after, before))
+    if not page:
+        # الصفحة أصبحت فارغة (انتهت أحداثها): نعود للصفحة الأولى
+        page = await render_once(app, ('events', None, None), int(app.clock.time()), lambda now_ts: build_events_page(app, now_ts))
+    if not page:
+        await callback.answer("لا يوجد أحداث مضافة حاليًا.")
+        return
+
+    text, markup = page
+    try:
+        await callback.message.edit_text(text, parse_mode="Markdown", reply_markup=markup)
+    except TelegramBadRequest as e:
+        if "not modified" not in str(e).lower():
+            raise
+    await callback.answer()
+
+# Unified handler for deleting events
+@on("message", Command('delevents'))
+@on("message", F.text.lower().in_(['حذف_الاحداث']))
+async def cmd_delete_events(message: types.Message, app):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية حذف الأحداث.")
+        return
+
+    def delete_events(conn):
+        events = conn.execute("SELECT id FROM content WHERE game = ? AND section = 'events'", (app.config.game,)).fetchall()
+        delete_content(conn, [row[0] for row in events])
+
+    await app.db.transaction(delete_events)
+    app.invalidate_content('events')
+    app.reschedule_alerts()
+    await message.reply("✅ تم حذف جميع الأحداث بنجاح.")
+
+# New handler for the custom 'الاوامر' command
+@on("message", F.text.lower().in_(['الاوامر']))
+async def cmd_custom_commands(message: types.Message):
+    await message.reply(
+        "اوامر بوت ساندرون :\n\n"
+        "/the_banner البنر او\n" # Changed /banner to /the_banner
+        "/stygian ستيجيان او\n"
+        "/spiral_abyss الابيس او\n"
+        "/theater المسرح او\n"
+        "/event الاحداث او"
+    )
+
+# Unified handler for adding admin
+@on("message", Command('addadmin'))
+@on("message", F.text.lower().startswith('اضافة_مشرف'))
+async def cmd_addadmin(message: types.Message, app, command: Command=None):
+    if message.from_user.id != app.config.owner_id:
+        await message.reply("🚫 فقط المالك يمكنه إضافة مشرفين.")
+        return
+
+    if command and command.args:
+        args = command.args.split()
+    else:
+        args = message.text.split()[1:]
+
+    if not args:
+        await message.reply("يرجى كتابة معرف المستخدم لإضافته كمشرف.\nمثال:\n/addadmin 123456789")
+        return
+    try:
+        new_id = int(args[0])
+        await app.db.execute("INSERT OR IGNORE INTO admins (user_id) VALUES (?)", (new_id,))
+        app.cache.invalidate('admins')
+        await message.reply(f"✅ تم إضافة المستخدم {new_id} كمشرف.")
+    except (ValueError, IndexError):
+        await message.reply("❌ حدث خطأ أثناء الإضافة. يرجى التأكد من أن المعرف هو رقم صحيح.")
+
+# Unified handler for removing admin
+@on("message", Command('removeadmin'))
+@on("message", F.text.lower().startswith('ازالة_مشرف'))
+async def cmd_removeadmin(message: types.Message, app, command: Command=None):
+    if message.from_user.id != app.config.owner_id:
+        await message.reply("🚫 فقط المالك يمكنه إزالة المشرفين.")
+        return
+
+    if command and command.args:
+        args = command.args.split()
+    else:
+        args = message.text.split()[1:]
+
+    if not args:
+        await message.reply("يرجى كتابة معرف المستخدم لإزالته من المشرفين.\nمثال:\n/removeadmin 123456789")
+        return
+    try:
+        rem_id = int(args[0])
+        if rem_id == app.config.owner_id:
+            await message.reply("🚫 لا يمكن إزالة المالك نفسه.")
+            return
+        await app.db.execute("DELETE FROM admins WHERE user_id = ?", (rem_id,))
+        app.cache.invalidate('admins')
+        await message.reply(f"✅ تم إزالة المستخدم {rem_id} من المشرفين.")
+    except (ValueError, IndexError):
+        await message.reply("❌ حدث خطأ أثناء الحذف. يرجى التأكد من أن المعرف هو رقم صحيح.")
+
+# Handlers for alert subscriptions of the current chat
+@on("message", Command('subscribe'))
+@on("message", F.text.lower().startswith('اشتراك_التنبيهات'))
+async def cmd_subscribe(message: types.Message, app, command: Command = None):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية إدارة الاشتراكات.")
+        return
+
+    if command and command.args:
+        args = command.args.lower().split()
+    else:
+        args = message.text.lower().split()[1:]
+
+    region_names = {server for server, _, _ in await app.cache.get('regions', app.config.game)}
+    sections = [arg for arg in args if arg in arabic_section_titles]
+    regions = [arg for arg in args if arg in region_names]
+    unknown = [arg for arg in args if arg not in arabic_section_titles and arg not in region_names]
+    if unknown:
+        await message.reply(
+            f"❌ قيم غير معروفة: {', '.join(unknown)}\n"
+            f"الأقسام: {', '.join(arabic_section_titles)}\n"
+            f"السيرفرات: {', '.join(sorted(region_names))}"
+        )
+        return
+
+    await app.db.execute("""
+        INSERT INTO subscriptions (chat_id, sections, regions, created_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (chat_id) DO UPDATE SET sections = excluded.sections, regions = excluded.regions
+    """, (message.chat.id, ",".join(sections) or None, ",".join(regions) or None, int(app.clock.time())))
+    app.cache.invalidate('subscriptions')
+    await message.reply(
+        "✅ تم اشتراك هذه المحادثة في التنبيهات.\n"
+        f"الأقسام: {', '.join(sections) or 'الكل'}\n"
+        f"السيرفرات: {', '.join(regions) or 'الكل'}"
+    )
+
+@on("message", Command('unsubscribe'))
+@on("message", F.text.lower().in_(['الغاء_التنبيهات']))
+async def cmd_unsubscribe(message: types.Message, app):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية إدارة الاشتراكات.")
+        return
+
+    await drop_subscription(app, message.chat.id)
+    await message.reply("✅ تم إلغاء اشتراك هذه المحادثة في التنبيهات.")
+
+# Handler for adding/updating a server (region) of the current game
+@on("message", Command('setregion'))
+async def cmd_set_region(message: types.Message, command: Command, app):
+    if message.from_user.id != app.config.owner_id:
+        await message.reply("🚫 فقط المالك يمكنه تعديل السيرفرات.")
+        return
+
+    args = command.args.split(maxsplit=2) if command.args else []
+    try:
+        server = args[0].lower()
+        offset_hours = int(args[1])
+    except (ValueError, IndexError):
+        await message.reply("يرجى كتابة السيرفر وفرق التوقيت واسم العرض.\nمثال:\n/setregion asia 8 آسيا")
+        return
+    label = args[2] if len(args) > 2 else server
+    game = app.config.game
+
+    def save_region(conn):
+        position = conn.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM server_offsets WHERE game = ?", (game,)).fetchone()[0]
+        conn.execute("""
+            INSERT INTO server_offsets (game, server, offset_hours, label, position)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (game, server) DO UPDATE SET offset_hours = excluded.offset_hours, label = excluded.label
+        """, (game, server, offset_hours, label, position))
+
+    await app.db.transaction(save_region)
+    app.invalidate_content('regions')
+    await message.reply(f"✅ تم حفظ سيرفر {label} (UTC{offset_hours:+d}).")
+
+@on("message", Command('delregion'))
+async def cmd_del_region(message: types.Message, command: Command, app):
+    if message.from_user.id != app.config.owner_id:
+        await message.reply("🚫 فقط المالك يمكنه تعديل السيرفرات.")
+        return
+
+    if not command.args:
+        await message.reply("يرجى كتابة اسم السيرفر لحذفه.\nمثال:\n/delregion asia")
+        return
+    server = command.args.split()[0].lower()
+    game = app.config.game
+
+    def delete_region(conn):
+        servers = [row[0] for row in conn.execute("SELECT server FROM server_offsets WHERE game = ? ORDER BY position, server", (game,))]
+        if server not in servers:
+            return None
+        if len(servers) == 1:
+            return False
+        # المحتوى الذي ليس له موعد إلا في هذا السيرفر (مثل الأحداث عند حذف أول سيرفر)
+        # ينتقل موعده إلى أول سيرفر متبقٍ؛ المواعيد بتوقيت UTC فلا تتغير لحظة الانتهاء
+        first = next(s for s in servers if s != server)
+        moved = [row[0] for row in conn.execute("""
+            SELECT content_id FROM content_deadlines d
+            WHERE game = ? AND region = ?
+              AND NOT EXISTS (SELECT 1 FROM content_deadlines o WHERE o.content_id = d.content_id AND o.region != d.region)
+        """, (game, server))]
+        params = [(first, content_id, server) for content_id in moved]
+        conn.executemany("UPDATE content_deadlines SET region = ? WHERE content_id = ? AND region = ?", params)
+        conn.executemany("UPDATE OR IGNORE sent_alerts SET server = ? WHERE content_id = ? AND server = ?", params)
+        conn.execute("DELETE FROM content_deadlines WHERE game = ? AND region = ?", (game, server))
+        conn.execute("DELETE FROM server_offsets WHERE game = ? AND server = ?", (game, server))
+        return len(moved)
+
+    moved = await app.db.transaction(delete_region)
+    if moved is None:
+        await message.reply(f"❌ لا يوجد سيرفر باسم {server}.")
+        return
+    if moved is False:
+        await message.reply("🚫 لا يمكن حذف آخر سيرفر للعبة.")
+        return
+    # مواعيد السيرفر حُذفت معه: الأقسام والأحداث والتنبيهات تتغير أيضاً
+    app.invalidate_content('regions', 'section', 'events')
+    app.reschedule_alerts()
+    note = f"\nنُقلت إلى أول سيرفر متبقٍ مواعيد {moved} عنصر ليس لها سيرفر آخر (مثل الأحداث)." if moved else ""
+    await message.reply(f"✅ تم حذف سيرفر {server} ومواعيده.{note}")
+
+# --- Bulk Import / Export ---
+
+@on("message", Command('import'))
+async def cmd_import(message: types.Message, command: Command, app):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية تعديل المحتوى.")
+        return
+
+    document = message.document or (message.reply_to_message.document if message.reply_to_message else None)
+    try:
+        if document:
+            if document.file_size and document.file_size > IMPORT_MAX_BYTES:
+                await message.reply("❌ الملف كبير جداً.")
+                return
+            data = (await app.bot.download(document)).read()
+            doc = bulk.parse_document(data, document.file_name or "")
+        elif command.args:
+            servers = [server for server, _, _ in await app.cache.get('regions', app.config.game)]
+            doc = bulk.parse_lines(command.args, servers)
+        else:
+            await message.reply(
+                "أرسل ملف JSON أو CSV مع /import في التعليق، أو رسالة بهذا الشكل:\n"
+                "/import\n"
+                "banner ; العنوان ; اسم الحدث ; وقت كل سيرفر مفصول بـ ;\n"
+                "abyss ; العنوان ; وقت كل سيرفر مفصول بـ ;\n"
+                "events ; اسم الحدث ; YYYY-MM-DD HH:MM:SS\n\n"
+                "للحصول على الصيغة الكاملة استخدم /export"
+            )
+            return
+    except ValueError as e:
+        await message.reply(f"❌ {e}")
+        return
+
+    sections, events, errors = await prepare_import(app, doc)
+    if errors:
+        await message.reply("❌ لم يتم الاستيراد، صحح الأخطاء التالية:\n" + "\n".join(errors[:20]))
+        return
+    if not sections and not events:
+        await message.reply("لا يوجد شيء للاستيراد.")
+        return
+
+    # 🟢 كل العناصر في معاملة واحدة، ثم تحديث واحد للكاش وجدول التنبيهات
+    await app.db.transaction(lambda conn: apply_import(conn, app.config.game, sections, events))
+    app.invalidate_content('section', 'events')
+    app.reschedule_alerts()
+    await message.reply(f"✅ تم استيراد {len(sections)} قسم و {len(events)} حدث.")
+
+@on("message", Command('export'))
+@on("message", F.text.lower().startswith('تصدير_المحتوى'))
+async def cmd_export(message: types.Message, app, command: Command = None):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية تعديل المحتوى.")
+        return
+
+    if command and command.args:
+        args = command.args.lower().split()
+    else:
+        args = message.text.lower().split()[1:]
+
+    game = app.config.game
+    doc = await export_content(app)
+    if args and args[0] == 'csv':
+        servers = [server for server, _, _ in await app.cache.get('regions', game)]
+        data, filename = bulk.to_csv(doc, servers), f"{game}-content.csv"
+    else:
+        data, filename = bulk.to_json(doc), f"{game}-content.json"
+    await message.reply_document(
+        types.BufferedInputFile(data, filename=filename),
+        caption=f"📦 {len(doc['sections'])} قسم و {len(doc['events'])} حدث"
+    )
+
+# Handler for the archive of expired content
+HISTORY_LIMIT = 20
+
+@on("message", Command('history'))
+@on("message", F.text.lower().startswith('السجل'))
+async def cmd_history(message: types.Message, app, command: Command = None):
+    """/history [section] [من YYYY-MM-DD] [إلى YYYY-MM-DD] [نص من العنوان]"""
+    if command and command.args:
+        args = command.args.split()
+    else:
+        args = message.text.split()[1:]
+
+    sections = {**{key: key for key in arabic_section_titles}, **{title: key for key, title in arabic_section_titles.items()}}
+    sections['events'] = sections['الاحداث'] = 'events'
+    section, dates, words = None, [], []
+    for arg in args:
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", arg):
+            dates.append(arg)
+        elif section is None and arg.lower() in sections:
+            section = sections[arg.lower()]
+        else:
+            words.append(arg)
+
+    # التواريخ بتوقيت أول سيرفر، و"إلى" تشمل اليوم كاملاً
+    offset_hours = next((offset for _, offset, _ in await app.cache.get('regions', app.config.game)), 0)
+    bounds = [parse_end_datetime(f"{date} 00:00:00", offset_hours) for date in dates[:2]]
+    if len(dates) > 2 or None in bounds:
+        await message.reply("❌ صيغة غير صحيحة.\nمثال:\n/history banner 2024-01-01 2024-06-30")
+        return
+
+    sql = "SELECT section, title, name, ended_at FROM content_history WHERE game = ?"
+    params = [app.config.game]
+    if section:
+        sql += " AND section = ?"
+        params.append(section)
+    if bounds:
+        sql += " AND ended_at >= ?"
+        params.append(int(bounds[0].timestamp()))
+    if len(bounds) == 2:
+        sql += " AND ended_at < ?"
+        params.append(int(bounds[1].timestamp()) + 86400)
+    if words:
+        sql += " AND (title LIKE ? OR name LIKE ?)"
+        params += [f"%{' '.join(words)}%"] * 2
+    sql += " ORDER BY ended_at DESC LIMIT ?"
+    params.append(HISTORY_LIMIT)
+
+    rows = await app.db.fetchall(sql, params)
+    if not rows:
+        await message.reply("لا يوجد محتوى منتهٍ مطابق في السجل.")
+        return
+
+    text = "📜 **سجل المحتوى المنتهي:**\n\n"
+    for row_section, title, name, ended_at in rows:
+        label = title or arabic_section_titles.get(row_section, row_section)
+        if row_section == 'events':
+            label = name
+        elif row_section == 'banner' and name:
+            label += f" - {name}"
+        # العناوين من إدخال المشرفين: نهرّبها كما في نص التنبيهات
+        text += f"🔸 {escape_markdown(label)}\n انتهى {format_end_datetime(ended_at, offset_hours)[:10]}\n\n"
+    if len(rows) == HISTORY_LIMIT:
+        text += f"(أحدث {HISTORY_LIMIT} نتيجة فقط، حدد القسم أو التاريخ لتضييق البحث)"
+    await message.reply(text, parse_mode="Markdown")
+
+# Handlers for live (pinned, self-updating) countdown messages
+@on("message", Command('live'))
+@on("message", F.text.lower().startswith('عداد_مباشر'))
+async def cmd_live(message: types.Message, app, command: Command = None):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية إدارة العدادات.")
+        return
+
+    if command and command.args:
+        args = command.args.lower().split()
+    else:
+        args = message.text.lower().split()[1:]
+
+    section = args[0] if args else None
+    if section not in arabic_section_titles and section != 'events':
+        await message.reply(
+            "يرجى كتابة القسم.\nمثال:\n/live banner\n"
+            f"الأقسام: {', '.join([*arabic_section_titles, 'events'])}"
+        )
+        return
+
+    text, file_id, next_edit_at = await build_live(app, section, int(app.clock.time()))
+    if file_id:
+        sent = await message.answer_photo(photo=file_id, caption=text, parse_mode="Markdown")
+    else:
+        sent = await message.answer(text, parse_mode="Markdown")
+    try:
+        await app.bot.pin_chat_message(message.chat.id, sent.message_id, disable_notification=True)
+    except (TelegramBadRequest, TelegramForbiddenError) as e:
+        logging.warning(f"Could not pin live message in chat {message.chat.id}: {e}")
+
+    old = await app.db.fetchone("SELECT message_id FROM live_messages WHERE chat_id = ? AND section = ?", (message.chat.id, section))
+    await app.db.execute("""
+        INSERT INTO live_messages (chat_id, section, message_id, file_id, text, next_edit_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (chat_id, section) DO UPDATE SET
+            message_id = excluded.message_id, file_id = excluded.file_id,
+            text = excluded.text, next_edit_at = excluded.next_edit_at
+    """, (message.chat.id, section, sent.message_id, file_id, text, next_edit_at))
+    if old:
+        try:
+            await app.bot.unpin_chat_message(message.chat.id, message_id=old[0])
+        except (TelegramBadRequest, TelegramForbiddenError):
+            pass
+    app.live_refresh.set()
+    # مهمة العداد تعمل على القائد فقط: إن كانت هذه نسخة تابعة فالإبطال يوقظه
+    app.publish_invalidation(('live',))
+
+@on("message", Command('unlive'))
+@on("message", F.text.lower().startswith('ايقاف_العداد'))
+async def cmd_unlive(message: types.Message, app, command: Command = None):
+    if not await app.is_admin(message.from_user.id):
+        await message.reply("🚫 ليس لديك صلاحية إدارة العدادات.")
+        return
+
+    if command and command.args:
+        args = command.args.lower().split()
+    else:
+        args = message.text.lower().split()[1:]
+
+    section = args[0] if args else None
+    row = await app.db.fetchone("SELECT message_id FROM live_messages WHERE chat_id = ? AND section = ?", (message.chat.id, section))
+    if not row:
+        await message.reply("لا يوجد عداد مباشر لهذا القسم في هذه المحادثة.\nمثال:\n/unlive banner")
+        return
+
+    await app.db.execute("DELETE FROM live_messages WHERE chat_id = ? AND section = ?", (message.chat.id, section))
+    try:
+        await app.bot.unpin_chat_message(message.chat.id, message_id=row[0])
+    except (TelegramBadRequest, TelegramForbiddenError):
+        pass
+    await message.reply(f"✅ تم إيقاف العداد المباشر لقسم {section}.")
+
+@on("message", Command('cachestats'))
+async def cmd_cache_stats(message: types.Message, app):
+    if message.from_user.id != app.config.owner_id:
+        return
+    stats = app.cache.stats()
+    await message.reply(
+        "📊 إحصائيات الكاش:\n"
+        f"hits: {stats['hits']}\n"
+        f"misses: {stats['misses']}\n"
+        f"hit ratio: {stats['hit_ratio']:.1%}\n"
+        f"entries: {stats['entries']}"
+    )
+
+@on("message", Command('stats'))
+async def cmd_stats(message: types.Message, app):
+    if message.from_user.id != app.config.owner_id:
+        return
+    metrics = app.metrics
+
+    def line(label, histogram, unit=1000, suffix="ms"):
+        return (
+            f"{label}: {histogram.count} | avg {histogram.sum / histogram.count * unit:.1f}{suffix}"
+            f" | p99 ≤ {histogram.quantile(0.99) * unit:g}{suffix}"
+        )
+
+    sections = {"handlers": [], "api": [], "db": [], "alerts": []}
+    for (name, labels), histogram in sorted(metrics.histograms.items()):
+        if not histogram.count:
+            continue
+        label = ",".join(str(v) for _, v in labels)
+        if name == "handler_seconds":
+            queries = metrics.histograms.get(("handler_queries", labels))
+            avg_queries = queries.sum / queries.count if queries and queries.count else 0
+            sections["handlers"].append(f"{line(label, histogram)} | {avg_queries:.1f} q")
+        elif name == "api_seconds":
+            sections["api"].append(line(label, histogram))
+        elif name == "db_query_seconds":
+            sections["db"].append(line(label, histogram))
+        elif name == "alert_lag_seconds":
+            sections["alerts"].append(line("lag", histogram, unit=1, suffix="s"))
+    for (name, _), value in sorted(metrics.counters.items()):
+        if name.startswith("alerts_"):
+            sections["alerts"].append(f"{name}: {value:g}")
+
+    throttled = sum(value for (name, _), value in metrics.counters.items() if name == "throttled_updates")
+
+    cache_stats = app.cache.stats()
+    text = "📊 إحصائيات البوت:\n"
+    text += "\n⚙️ المعالجات:\n" + ("\n".join(sections["handlers"]) or "-")
+    text += "\n\n📡 Bot API:\n" + ("\n".join(sections["api"]) or "-")
+    text += "\n\n🗄 قاعدة البيانات:\n" + ("\n".join(sections["db"]) or "-")
+    text += "\n\n🔔 التنبيهات:\n" + ("\n".join(sections["alerts"]) or "-")
+    text += f"\n\n💾 الكاش: {cache_stats['hits']} hits / {cache_stats['misses']} misses"
+    text += f"\n🚦 تحديثات مرفوضة (throttling): {throttled:g}"
+    await message.reply(text)
+
+# Owner handlers for database backup and restore
+@on("message", Command('backup'))
+async def cmd_backup(message: types.Message, app):
+    if message.from_user.id != app.config.owner_id:
+        await message.reply("🚫 فقط المالك يمكنه إدارة النسخ الاحتياطية.")
+        return
+
+    try:
+        name, size, seconds = await create_backup(app)
+    except Exception as e:
+        logging.error(f"Manual backup failed: {e}")
+        await message.reply(f"❌ فشل النسخ الاحتياطي: {e}")
+        return
+
+    caption = f"💾 {name}\nالحجم: {size / 1024:.1f} KB - المدة: {seconds:.2f} ثانية"
+    # الملف يحتوي على كل البيانات، فلا يُرسل إلا في المحادثة الخاصة
+    if message.chat.type == "private" and size <= 50 * 1024 * 1024:
+        await message.reply_document(types.FSInputFile(os.path.join(app.config.backup_dir, name)), caption=caption)
+    else:
+        await message.reply(caption)
+
+@on("message", Command('restore'))
+async def cmd_restore(message: types.Message, command: Command, app):
+    if message.from_user.id != app.config.owner_id:
+        await message.reply("🚫 فقط المالك يمكنه إدارة النسخ الاحتياطية.")
+        return
+
+    backup_dir = app.config.backup_dir
+    backups = list_backups(app)
+    document = message.document or (message.reply_to_message.document if message.reply_to_message else None)
+    name = command.args.strip() if command.args else None
+    if not document and not name:
+        listing = "\n".join(backups[:10]) or "لا توجد نسخ بعد."
+        await message.reply(f"📂 النسخ الاحتياطية:\n{listing}\n\nللاستعادة: /restore اسم_النسخة\nأو أرسل ملف النسخة مع /restore")
+        return
+    if not document and name not in backups:
+        await message.reply("❌ لا توجد نسخة بهذا الاسم.")
+        return
+
+    # نسخة من الحالة الحالية أولاً حتى يمكن التراجع عن الاستعادة
+    try:
+        pre_name, _, _ = await create_backup(app, "-pre-restore")
+        if document:
+            os.makedirs(backup_dir, exist_ok=True)
+            path = os.path.join(backup_dir, f"upload-{document.file_unique_id}.tmp")
+            await app.bot.download(document, destination=path)
+            name = document.file_name or "uploaded file"
+        else:
+            path = os.path.join(backup_dir, name)
+        try:
+            await restore_backup(app, path)
+        finally:
+            if document and os.path.exists(path):
+                os.remove(path)
+    except Exception as e:
+        logging.error(f"Restore failed: {e}")
+        await message.reply(f"❌ فشلت الاستعادة: {e}")
+        return
+
+    await message.reply(f"✅ تمت الاستعادة من {name}.\nالبيانات السابقة محفوظة في {pre_name}")
+
+# Unified handler for start/help message
+@on("message", Command('start', 'help'))
+@on("message", F.text.lower().in_(['بدء']))
+async def cmd_start(message: types.Message):
+    await message.reply(
+        "مرحبًا! أنا بوت مواعيد Genshin.\n"
+        "الأوامر:\n"
+        "/the_banner البنر أو التبـنر - عرض البنر الحالي\n" # Changed /banner to /the_banner and added 'التبنر'
+        "events أو الاحداث - عرض الأحداث\n"
+        "abyss أو الابيس - عرض موعد الأبِس\n"
+        "stygian أو ستيجيان - عرض موعد ستيجيان\n"
+        "theater أو المسرح - عرض موعد المسرح\n"
+        "history [section] [from] [to] [text] أو السجل - البحث في المحتوى المنتهي\n"
+        "ويمكن كتابة @اسم_البوت ثم القسم في أي محادثة لمشاركة العد التنازلي\n\n"
+        "للمشرفين:\n"
+        "setbanner أو setbanner_ar - تحديث البنر (يرسل نص ثم صورة)\n"
+        "setevents أو setevents_ar - إضافة حدث جديد (يرسل نص فقط)\n"
+        "delevents أو حذف_الاحداث - حذف جميع الأحداث (للمشرفين)\n"
+        "setabyss أو setabyss_ar - تحديث الأبِس (يرسل نص ثم صورة)\n"
+        "setstygian أو setstygian_ar - تحديث ستيجيان (يرسل نص ثم صورة)\n"
+        "settheater أو settheater_ar - تحديث المسرح (يرسل نص ثم صورة)\n\n"
+        "subscribe [sections] [servers] أو اشتراك_التنبيهات - اشتراك المحادثة في التنبيهات\n"
+        "unsubscribe أو الغاء_التنبيهات - إلغاء اشتراك المحادثة\n"
+        "import - استيراد عدة أقسام وأحداث دفعة واحدة (JSON/CSV/نص)\n"
+        "export [csv] أو تصدير_المحتوى - تصدير المحتوى الحالي\n"
+        "live [section] أو عداد_مباشر - رسالة عد تنازلي مثبتة تتحدث تلقائياً\n"
+        "unlive [section] أو ايقاف_العداد - إيقاف العداد المباشر\n"
+        "setregion [server] [offset] [label] - إضافة/تعديل سيرفر (للمالك)\n"
+        "delregion [server] - حذف سيرفر ومواعيده (للمالك)\n"
+        "backup / restore [name] - نسخة احتياطية من القاعدة أو استعادتها (للمالك)\n\n"
+        "لإضافة/حذف مشرفين:\n"
+        "addadmin [user_id] أو اضافة_مشرف [user_id]\n"
+        "removeadmin [user_id] أو ازالة_مشرف [user_id]"
+    )
@@ -0,0 +1,44 @@
+"""قفل قيادة (lease) في قاعدة البيانات المشتركة بين عدة نسخ من البوت.
+
+النسخة التي تملك الـ lease وحدها تشغّل مهام التنبيهات والتنظيف، وتجدده كل
+بضع ثوانٍ. إذا توقفت (انهيار مثلاً) تستلمه نسخة أخرى بعد انتهاء ttl.
+"""
+import time
+
+from .db import Database
+
+
+class LeaderLease:
+    def __init__(self, db: Database, name: str, holder: str, ttl: float = 15):
+        self.db = db
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        # حسب ساعتنا المحلية (monotonic): بعدها نعتبر أنفسنا فقدنا القيادة حتى لو تعذر التجديد
+        self.valid_until = 0.0
+
+    async def acquire(self) -> bool:
+        """يأخذ الـ lease أو يجدده؛ يرجع True إذا كنا صاحبه."""
+        started = time.monotonic()
+        now = time.time()
+
+        def take(conn):
+            # ننجح فقط إذا كان الـ lease لنا أصلاً أو انتهت صلاحيته
+            conn.execute("""
+                INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+            """, (self.name, self.holder, now + self.ttl, now))
+            return conn.execute("SELECT holder FROM leases WHERE name = ?", (self.name,)).fetchone()[0]
+
+        held = await self.db.transaction(take) == self.holder
+        self.valid_until = started + self.ttl if held else 0.0
+        return held
+
+    def held(self) -> bool:
+        return time.monotonic() < self.valid_until
+
+    async def release(self):
+        """يتخلى عن الـ lease عند الإيقاف حتى تستلمه نسخة أخرى فوراً."""
+        self.valid_until = 0.0
+        await self.db.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
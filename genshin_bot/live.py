@@ -0,0 +1,102 @@
+"""رسائل العد التنازلي المثبتة (live) التي يعدّلها البوت عندما يتغير النص المعروض."""
+import logging
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+
+from .formatting import next_text_change
+from .rendering import build_events_caption, build_section_caption
+
+async def build_live(app, section: str, now_ts: int):
+    """يرجع (text, file_id, next_edit_at) لرسالة القسم الحية."""
+    live_granularity, coarse_after = app.config.live_granularity, app.config.live_coarse_after
+    if section == 'events':
+        events, _, _ = await app.cache.get('events')
+        deadlines = [end_ts for _, _, end_ts in events]
+    else:
+        row = await app.cache.get('section', section)
+        deadlines = [end_ts for _, end_ts in row[4]] if row else []
+
+    upcoming = [end_ts - now_ts for end_ts in deadlines if end_ts > now_ts]
+    granularity = 3600 if upcoming and min(upcoming) > coarse_after else live_granularity
+    next_edit_at = next_text_change(deadlines, now_ts, granularity)
+    if granularity != live_granularity:
+        # لحظة الانتقال من العرض بالساعات إلى الدقائق
+        next_edit_at = min(next_edit_at, now_ts + min(upcoming) - coarse_after)
+
+    if section == 'events':
+        text = await build_events_caption(app, now_ts, granularity) or "لا يوجد أحداث مضافة حاليًا."
+        return text, None, next_edit_at
+    caption = await build_section_caption(app, section, now_ts, granularity)
+    text, file_id = caption or (f"لا يوجد محتوى مضاف لقسم {section}.", None)
+    return text, file_id, next_edit_at
+
+async def refresh_live_message(app, row, rendered):
+    chat_id, section, message_id, old_file_id, old_text = row
+    text, file_id, next_edit_at = rendered
+    # رسالة الصورة تبقى صورة حتى لو حُذف المحتوى، والرسالة النصية تبقى نصية
+    new_file_id = (file_id or old_file_id) if old_file_id else None
+
+    if text != old_text or new_file_id != old_file_id:
+        await app.live_edit_budget.acquire()
+        await app.send_limiter.acquire(chat_id)
+        try:
+            if new_file_id != old_file_id:
+                await app.bot.edit_message_media(
+                    chat_id=chat_id, message_id=message_id,
+                    media=types.InputMediaPhoto(media=new_file_id, caption=text, parse_mode="Markdown")
+                )
+            elif old_file_id:
+                await app.bot.edit_message_caption(chat_id=chat_id, message_id=message_id, caption=text, parse_mode="Markdown")
+            else:
+                await app.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, parse_mode="Markdown")
+        except TelegramRetryAfter as e:
+            await app.db.execute(
+                "UPDATE live_messages SET next_edit_at = ? WHERE chat_id = ? AND section = ?",
+                (int(app.clock.time()) + e.retry_after, chat_id, section)
+            )
+            return
+        except (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound) as e:
+            if not (isinstance(e, TelegramBadRequest) and "not modified" in str(e).lower()):
+                # الرسالة حُذفت أو لم يعد البوت في المحادثة
+                await app.db.execute("DELETE FROM live_messages WHERE chat_id = ? AND section = ?", (chat_id, section))
+                logging.warning(f"Dropped live message {section} in chat {chat_id}: {e}")
+                return
+        app.metrics.inc("live_edits", section=section)
+
+    await app.db.execute(
+        "UPDATE live_messages SET file_id = ?, text = ?, next_edit_at = ? WHERE chat_id = ? AND section = ?",
+        (new_file_id, text, next_edit_at, chat_id, section)
+    )
+
+async def update_live_messages(app):
+    """المهمة الخلفية: تعدّل الرسائل الحية فقط عندما يتغير النص المعروض فيها."""
+    while True:
+        timeout = None
+        try:
+            now_ts = int(app.clock.time())
+            if app.live_refresh.is_set():
+                # تغيّر المحتوى: نراجع كل الرسائل (ولا نعدّل إلا ما اختلف نصه)
+                app.live_refresh.clear()
+                rows = await app.db.fetchall("SELECT chat_id, section, message_id, file_id, text FROM live_messages")
+            else:
+                rows = await app.db.fetchall("""
+                    SELECT chat_id, section, message_id, file_id, text FROM live_messages
+                    WHERE next_edit_at <= ?
+                """, (now_ts,))
+
+            rendered = {}
+            for row in rows:
+                section = row[1]
+                if section not in rendered:
+                    rendered[section] = await build_live(app, section, now_ts)
+                await refresh_live_message(app, row, rendered[section])
+
+            next_edit = (await app.db.fetchone("SELECT MIN(next_edit_at) FROM live_messages"))[0]
+            if next_edit is not None:
+                timeout = max(0, next_edit - app.clock.time())
+        except Exception as e:
+            logging.error(f"Error in live messages task: {e}")
+            timeout = 30
+
+        await app.clock.wait(app.live_refresh, timeout)
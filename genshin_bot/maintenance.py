@@ -0,0 +1,141 @@
+"""مهام الصيانة الخلفية: انتهاء الأحداث، ضغط القاعدة، والنسخ الاحتياطية."""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from .content import archive_content
+from .migrations import SCHEMA_VERSION
+from .schema import setup_database
+
+# --- Event Expiry ---
+
+async def expire_events(app):
+    """المهمة الخلفية: تحذف الأحداث عند انتهائها فتبقى قراءات الأحداث بدون كتابة."""
+    while True:
+        timeout = None
+        app.events_expiry_changed.clear()
+        try:
+            now_ts = int(app.clock.time())
+            next_deadline = (await app.db.fetchone("""
+                SELECT MIN(d.deadline) FROM content_deadlines d
+                JOIN content c ON c.id = d.content_id
+                WHERE c.section = 'events'
+            """))[0]
+            if next_deadline is not None and next_deadline <= now_ts:
+                def delete_expired_events(conn):
+                    expired = conn.execute("""
+                        SELECT d.content_id FROM content_deadlines d
+                        JOIN content c ON c.id = d.content_id
+                        WHERE d.deadline <= ? AND c.section = 'events'
+                    """, (now_ts,)).fetchall()
+                    archive_content(conn, [row[0] for row in expired], now_ts)
+                    return len(expired)
+
+                removed = await app.db.transaction(delete_expired_events)
+                app.invalidate_content('events')
+                app.metrics.inc("events_expired", removed)
+                logging.info(f"Expired {removed} events")
+                continue
+            if next_deadline is not None:
+                timeout = max(0, next_deadline - app.clock.time())
+        except Exception as e:
+            logging.error(f"Error in event expiry task: {e}")
+            timeout = 30
+
+        await app.clock.wait(app.events_expiry_changed, timeout)
+
+# --- Compaction ---
+
+# 🟢 sent_alerts تُنظف عند تحديث القسم فقط، فتبقى سجلات لمحتوى محذوف أو سيرفرات أزيلت.
+# المهمة الدورية تحذفها ثم تعيد حتى vacuum_pages صفحة فارغة للنظام في كل مرة.
+async def compact_database(app):
+    """المهمة الخلفية: حذف سجلات التنبيهات اليتيمة و incremental_vacuum."""
+    vacuum_pages = app.config.vacuum_pages
+    while True:
+        try:
+            def compact(conn):
+                orphans = conn.execute("""
+                    DELETE FROM sent_alerts WHERE NOT EXISTS (
+                        SELECT 1 FROM content_deadlines d
+                        WHERE d.content_id = sent_alerts.content_id AND d.region = sent_alerts.server
+                    )
+                """).rowcount
+                freed = min(conn.execute("PRAGMA freelist_count").fetchone()[0], vacuum_pages)
+                # sqlite3 في بايثون ينفذ خطوة واحدة فقط من هذا الـ pragma (صفحة واحدة لكل استدعاء)
+                for _ in range(freed):
+                    conn.execute("PRAGMA incremental_vacuum(1)")
+                return orphans, freed
+
+            orphans, freed = await app.db.transaction(compact)
+            app.metrics.inc("sent_alerts_compacted", orphans)
+            if orphans or freed:
+                logging.info(f"Compaction: removed {orphans} orphan sent_alerts, freed {freed} pages")
+        except Exception as e:
+            logging.error(f"Error in compaction task: {e}")
+        await asyncio.sleep(app.config.compact_interval)
+
+# --- Backups ---
+
+# 🟢 القاعدة هي النسخة الوحيدة من البيانات: نسخ احتياطية دورية في backup_dir
+# مع الاحتفاظ بآخر backup_keep نسخة.
+def list_backups(app):
+    """أسماء النسخ الاحتياطية من الأحدث للأقدم."""
+    backup_dir = app.config.backup_dir
+    if not os.path.isdir(backup_dir):
+        return []
+    return sorted((name for name in os.listdir(backup_dir) if name.startswith("genshin_bot-") and name.endswith(".db")), reverse=True)
+
+async def create_backup(app, tag: str = ""):
+    """ينشئ نسخة احتياطية ويحذف ما زاد عن backup_keep؛ يرجع (name, size, seconds)."""
+    backup_dir = app.config.backup_dir
+    async with app.backup_lock:
+        os.makedirs(backup_dir, exist_ok=True)
+        name = f"genshin_bot-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}{tag}.db"
+        path = os.path.join(backup_dir, name)
+        started = time.perf_counter()
+        try:
+            await app.db.backup(path + ".tmp", pages=app.config.backup_pages)
+            os.replace(path + ".tmp", path)
+        finally:
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+        seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+
+        for old_name in list_backups(app)[app.config.backup_keep:]:
+            os.remove(os.path.join(backup_dir, old_name))
+        logging.info(f"Backup {name} written: {size / 1024:.1f} KiB in {seconds:.2f}s")
+        return name, size, seconds
+
+async def restore_backup(app, path: str):
+    """يستعيد القاعدة الحية من نسخة ثم يرحّلها ويبطل كل الكاش."""
+    async with app.backup_lock:
+        started = time.perf_counter()
+        await app.db.restore(path, max_version=SCHEMA_VERSION)
+        await app.db.transaction(lambda conn: setup_database(conn, app.config))
+        # النسخة المستعادة قد تعيد cache_versions لقيم رأتها النسخ الأخرى: قيمة جديدة تجبرها على الإبطال
+        version = time.time_ns()
+        await app.db.execute("""
+            INSERT INTO cache_versions (key, version, instance) VALUES ('*', ?, ?)
+            ON CONFLICT (key) DO UPDATE SET version = excluded.version, instance = excluded.instance
+        """, (version, app.instance_id))
+        app.cache_versions['*'] = version
+        app.invalidate_content(propagate=False)
+        # حالات FSM في الذاكرة من القاعدة القديمة: المحادثات تقرأ حالتها من المستعادة
+        app.storage._lru.clear()
+        app.reschedule_alerts()
+        logging.info(f"Database restored from {path} in {time.perf_counter() - started:.2f}s")
+
+async def run_backups(app):
+    """المهمة الخلفية: نسخة احتياطية كل backup_interval ثانية (محسوبة من آخر نسخة)."""
+    while True:
+        backups = list_backups(app)
+        last = os.path.getmtime(os.path.join(app.config.backup_dir, backups[0])) if backups else 0
+        await asyncio.sleep(max(0, last + app.config.backup_interval - time.time()))
+        try:
+            await create_backup(app)
+        except Exception as e:
+            logging.error(f"Error in backup task: {e}")
+            await asyncio.sleep(300)
@@ -0,0 +1,142 @@
+"""قياسات وقت التشغيل: زمن المعالجات، استعلامات القاعدة، استدعاءات Bot API
+وتأخر التنبيهات، مع عرضها بصيغة Prometheus النصية.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+# حدود الأعمدة بالثواني
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# عدد الاستعلامات داخل التحديث الحالي (يضبطه HandlerMetricsMiddleware)
+update_queries = ContextVar("update_queries", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """تقدير تقريبي: الحد الأعلى للعمود الذي يبلغ فيه التراكم q."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def on_query(self, kind: str, seconds: float):
+        """خطاف db.Database: يُستدعى بعد كل استعلام."""
+        self.observe("db_query_seconds", seconds, kind=kind)
+        queries = update_queries.get()
+        if queries is not None:
+            queries[0] += 1
+
+    def render_prometheus(self) -> str:
+        def fmt_labels(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE timebot_{name}_total counter")
+            lines.append(f"timebot_{name}_total{fmt_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE timebot_{name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"timebot_{name}_bucket{fmt_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"timebot_{name}_bucket{fmt_labels(labels, [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"timebot_{name}_sum{fmt_labels(labels)} {histogram.sum}")
+            lines.append(f"timebot_{name}_count{fmt_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """يقيس زمن كل معالج وعدد استعلاماته، ويسجل المعالجات البطيئة."""
+
+    def __init__(self, metrics: Metrics, slow_threshold: float = 1.0):
+        self.metrics = metrics
+        self.slow_threshold = slow_threshold
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else type(event).__name__
+        queries = [0]
+        token = update_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.metrics.inc("handler_errors", handler=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            update_queries.reset(token)
+            self.metrics.observe("handler_seconds", elapsed, handler=name)
+            self.metrics.observe("handler_queries", queries[0], buckets=COUNT_BUCKETS, handler=name)
+            if elapsed >= self.slow_threshold:
+                logging.warning(f"Slow handler {name}: {elapsed * 1000:.0f} ms, {queries[0]} queries")
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """يقيس زمن كل استدعاء صادر إلى Bot API."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            self.metrics.inc("api_errors", method=name)
+            raise
+        finally:
+            self.metrics.observe("api_seconds", time.perf_counter() - started, method=name)
@@ -0,0 +1,281 @@
+"""ترحيلات مخطط قاعدة البيانات.
+
+رقم نسخة المخطط محفوظ في PRAGMA user_version؛ كل ترحيل يُطبَّق مرة واحدة
+بالترتيب داخل نفس المعاملة، فتنتقل ملفات genshin_bot.db القديمة إلى آخر
+نسخة في مكانها.
+"""
+import logging
+
+
+def migrate_1_initial(conn):
+    # المخطط الأصلي (قواعد البيانات القديمة لها user_version = 0 وهذه الجداول موجودة مسبقاً)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS admins (
+        user_id INTEGER PRIMARY KEY
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS content (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        section TEXT,
+        title TEXT,
+        name TEXT,
+        end_time_asia TEXT,
+        end_time_europe TEXT,
+        end_time_america TEXT,
+        description TEXT,
+        image_file_id TEXT
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS server_offsets (
+        server TEXT PRIMARY KEY,
+        offset_hours INTEGER
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS sent_alerts (
+        content_id INTEGER,
+        server TEXT,
+        alert_type TEXT, -- '1_hour_remaining', '<seconds>s_remaining' or 'expired'
+        PRIMARY KEY (content_id, server, alert_type)
+    )
+    """)
+
+
+def migrate_2_epoch_deadlines(conn):
+    # المواعيد تُخزن كثواني UTC (epoch) بدلاً من نص "%Y-%m-%d %H:%M:%S"
+    conn.execute("""
+    CREATE TABLE content_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        section TEXT,
+        title TEXT,
+        name TEXT,
+        end_time_asia INTEGER,
+        end_time_europe INTEGER,
+        end_time_america INTEGER,
+        description TEXT,
+        image_file_id TEXT
+    )
+    """)
+    conn.execute("""
+    INSERT INTO content_new (id, section, title, name, end_time_asia, end_time_europe, end_time_america, description, image_file_id)
+    SELECT id, section, title, name,
+           CAST(strftime('%s', end_time_asia) AS INTEGER),
+           CAST(strftime('%s', end_time_europe) AS INTEGER),
+           CAST(strftime('%s', end_time_america) AS INTEGER),
+           description, image_file_id
+    FROM content
+    """)
+    conn.execute("DROP TABLE content")
+    conn.execute("ALTER TABLE content_new RENAME TO content")
+    conn.execute("CREATE INDEX idx_content_section ON content (section)")
+    conn.execute("CREATE INDEX idx_content_end_asia ON content (end_time_asia)")
+    conn.execute("CREATE INDEX idx_content_end_europe ON content (end_time_europe)")
+    conn.execute("CREATE INDEX idx_content_end_america ON content (end_time_america)")
+
+
+def migrate_3_region_deadlines(conn):
+    # المناطق تُعرّف لكل لعبة في server_offsets بدلاً من أعمدة ثابتة في content
+    conn.execute("""
+    CREATE TABLE server_offsets_new (
+        game TEXT NOT NULL,
+        server TEXT NOT NULL,
+        offset_hours INTEGER NOT NULL,
+        label TEXT,
+        position INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (game, server)
+    )
+    """)
+    conn.execute("""
+    INSERT INTO server_offsets_new (game, server, offset_hours, label, position)
+    SELECT 'genshin', server, offset_hours,
+           CASE server WHEN 'asia' THEN 'آسيا' WHEN 'europe' THEN 'أوروبا' WHEN 'america' THEN 'أمريكا' ELSE server END,
+           CASE server WHEN 'asia' THEN 1 WHEN 'europe' THEN 2 WHEN 'america' THEN 3 ELSE 99 END
+    FROM server_offsets
+    """)
+    conn.execute("DROP TABLE server_offsets")
+    conn.execute("ALTER TABLE server_offsets_new RENAME TO server_offsets")
+
+    conn.execute("""
+    CREATE TABLE content_deadlines (
+        content_id INTEGER NOT NULL,
+        game TEXT NOT NULL,
+        region TEXT NOT NULL,
+        deadline INTEGER NOT NULL,
+        PRIMARY KEY (content_id, region)
+    )
+    """)
+    conn.execute("CREATE INDEX idx_deadlines_deadline ON content_deadlines (deadline, game, region)")
+    for region in ('asia', 'europe', 'america'):
+        conn.execute(f"""
+        INSERT INTO content_deadlines (content_id, game, region, deadline)
+        SELECT id, 'genshin', '{region}', end_time_{region} FROM content
+        WHERE end_time_{region} IS NOT NULL
+        """)
+
+    conn.execute("""
+    CREATE TABLE content_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        game TEXT NOT NULL DEFAULT 'genshin',
+        section TEXT,
+        title TEXT,
+        name TEXT,
+        description TEXT,
+        image_file_id TEXT
+    )
+    """)
+    conn.execute("""
+    INSERT INTO content_new (id, game, section, title, name, description, image_file_id)
+    SELECT id, 'genshin', section, title, name, description, image_file_id FROM content
+    """)
+    conn.execute("DROP TABLE content")
+    conn.execute("ALTER TABLE content_new RENAME TO content")
+    conn.execute("CREATE INDEX idx_content_game_section ON content (game, section)")
+
+
+def migrate_4_alert_outbox(conn):
+    # التنبيهات تُكتب هنا في نفس معاملة sent_alerts ثم يرسلها عامل التوصيل
+    conn.execute("""
+    CREATE TABLE alert_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        next_attempt_at INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("CREATE INDEX idx_outbox_next_attempt ON alert_outbox (next_attempt_at)")
+
+
+def migrate_5_subscriptions(conn):
+    # المحادثات المشتركة في التنبيهات؛ NULL في sections/regions تعني الكل
+    conn.execute("""
+    CREATE TABLE subscriptions (
+        chat_id INTEGER PRIMARY KEY,
+        sections TEXT,
+        regions TEXT,
+        created_at INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX idx_outbox_chat ON alert_outbox (chat_id)")
+
+
+def migrate_6_fsm_state(conn):
+    # حالات محادثات FSM (بدلاً من MemoryStorage)
+    conn.execute("""
+    CREATE TABLE fsm_state (
+        key TEXT PRIMARY KEY,
+        state TEXT,
+        data TEXT NOT NULL DEFAULT '{}',
+        updated_at INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX idx_fsm_state_updated ON fsm_state (updated_at)")
+
+
+def migrate_7_live_messages(conn):
+    # رسائل العد التنازلي المثبتة التي يحدّثها البوت بالتعديل (section = قسم أو 'events')
+    conn.execute("""
+    CREATE TABLE live_messages (
+        chat_id INTEGER NOT NULL,
+        section TEXT NOT NULL,
+        message_id INTEGER NOT NULL,
+        file_id TEXT,
+        text TEXT NOT NULL,
+        next_edit_at INTEGER,
+        PRIMARY KEY (chat_id, section)
+    )
+    """)
+    conn.execute("CREATE INDEX idx_live_next_edit ON live_messages (next_edit_at)")
+
+
+def migrate_8_leases(conn):
+    # قفل القيادة بين عدة نسخ من البوت، ونسخ مفاتيح الكاش لإبلاغ النسخ الأخرى بالتغييرات
+    conn.execute("""
+    CREATE TABLE leases (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE cache_versions (
+        key TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        instance TEXT
+    )
+    """)
+
+
+def migrate_9_card_cache(conn):
+    # file_id لكل بطاقة مرسومة حتى لا تُرفع البطاقة نفسها مرتين (card_key = بصمة محتوى البطاقة)
+    conn.execute("""
+    CREATE TABLE card_cache (
+        section TEXT NOT NULL,
+        card_key TEXT NOT NULL,
+        file_id TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        PRIMARY KEY (section, card_key)
+    )
+    """)
+    conn.execute("CREATE INDEX idx_card_cache_created ON card_cache (created_at)")
+
+
+def migrate_10_content_history(conn):
+    # أرشيف المحتوى المنتهي (deadlines = JSON {server: deadline}، ended_at = آخر موعد بين السيرفرات)
+    conn.execute("""
+    CREATE TABLE content_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_id INTEGER NOT NULL,
+        game TEXT NOT NULL,
+        section TEXT,
+        title TEXT,
+        name TEXT,
+        image_file_id TEXT,
+        deadlines TEXT NOT NULL,
+        ended_at INTEGER NOT NULL,
+        archived_at INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX idx_history_section_ended ON content_history (game, section, ended_at)")
+    conn.execute("CREATE INDEX idx_history_ended ON content_history (game, ended_at)")
+
+
+def migrate_11_meta(conn):
+    # علامات تُنفّذ مرة واحدة (مثل إضافة TARGET_CHAT_ID للاشتراكات)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    # فيها اشتراكات = أُضيف TARGET_CHAT_ID سابقاً (أو أُديرت يدوياً)؛ إعادته تلغي /unsubscribe.
+    # قاعدة قديمة بلا اشتراكات (ومنها ما قبل جدول subscriptions) يُضاف لها مرة واحدة
+    if conn.execute("SELECT 1 FROM subscriptions LIMIT 1").fetchone():
+        conn.execute("INSERT INTO meta (key, value) VALUES ('target_chat_seeded', '1')")
+
+
+MIGRATIONS = [
+    migrate_1_initial,
+    migrate_2_epoch_deadlines,
+    migrate_3_region_deadlines,
+    migrate_4_alert_outbox,
+    migrate_5_subscriptions,
+    migrate_6_fsm_state,
+    migrate_7_live_messages,
+    migrate_8_leases,
+    migrate_9_card_cache,
+    migrate_10_content_history,
+    migrate_11_meta,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def apply_migrations(conn):
+    """يطبّق الترحيلات الناقصة؛ يجب استدعاؤها داخل معاملة."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        migration(conn)
+        conn.execute(f"PRAGMA user_version = {number}")
+        logging.info(f"Database migrated to schema version {number} ({migration.__name__})")
@@ -0,0 +1,68 @@
+"""محددات معدل (token bucket) لإرسال الرسائل ضمن حدود Telegram.
+
+الحدود الموثقة تقريباً: 30 رسالة/ثانية للبوت كله، رسالة/ثانية للمحادثة
+الخاصة، و20 رسالة/دقيقة للمجموعة الواحدة.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens: float = 1) -> float:
+        """الثواني المتبقية حتى يتوفر العدد المطلوب."""
+        self._refill()
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1):
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(self.delay(tokens))
+
+
+class SendLimiter:
+    """يجمع محدداً عاماً للبوت مع محدد لكل محادثة."""
+
+    def __init__(self, global_rate: float = 30, private_rate: float = 1, group_rate: float = 20 / 60, max_chats: int = 10000):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        # LRU: المحادثة الأقدم استخداماً يمتلئ دلوها بعد ثوانٍ، فحذفه لا يتجاوز حدودها
+        self.max_chats = max_chats
+        self.chat_buckets = OrderedDict()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            # معرفات المجموعات والقنوات سالبة
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, 3)
+            else:
+                bucket = TokenBucket(self.private_rate, 1)
+            self.chat_buckets[chat_id] = bucket
+            while len(self.chat_buckets) > self.max_chats:
+                self.chat_buckets.popitem(last=False)
+        else:
+            self.chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id: int):
+        await self._chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
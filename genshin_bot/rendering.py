@@ -0,0 +1,235 @@
+"""بناء نصوص الأقسام والأحداث ونتائج inline وبطاقات العد التنازلي."""
+import asyncio
+import hashlib
+
+from aiogram import types
+
+from .formatting import arabic_section_titles, next_text_change, time_left_str
+
+async def build_section_caption(app, section_key: str, now_ts: int, granularity: int = 1):
+    """يبني نص القسم؛ يرجع (text, file_id) أو None إذا لم يكن هناك محتوى."""
+    row = await app.cache.get('section', section_key)
+    if not row:
+        return None
+
+    _, title, name, file_id, deadlines = row
+
+    if title:
+        text = f"🔹 **{title} :**\n\n"
+    else:
+        arabic_section_title = arabic_section_titles.get(section_key, section_key)
+        text = f"🔹 **{arabic_section_title} :**\n\n"
+
+    if section_key == 'banner' and name:
+        text += f"**{name}**\n\n"
+
+    server_name_map = await app.region_labels(app.config.game)
+
+    for server_key, end_ts in deadlines:
+        arabic_server_name = server_name_map.get(server_key, server_key)
+
+        time_left = time_left_str(end_ts, now_ts, granularity)
+
+        text += f"⏳الوقت المتبقي سيرفر {arabic_server_name} :\n"
+        text += f" ●← {time_left}\n\n"
+
+    return text, file_id
+
+async def build_events_page(app, now_ts: int, after=None, before=None, granularity: int = 1):
+    """يبني صفحة من قائمة الأحداث؛ يرجع (text, reply_markup) أو None."""
+    events, has_prev, has_next = await app.cache.get('events', after, before)
+    if not events:
+        return None
+
+    text = "📌 **قائمة الأحداث الحالية:**\n\n"
+    for _, name, end_ts in events:
+        time_left = time_left_str(end_ts, now_ts, granularity)
+
+        text += f"**🔸 {name}**\n\n"
+        text += f"⏳الوقت المتبقي\n{time_left}\n"
+        text += "---\n"
+
+    # 🟢 أزرار التنقل تحمل مفتاح أول/آخر حدث في الصفحة (keyset) بدلاً من رقم الصفحة
+    buttons = []
+    if has_prev:
+        first_id, _, first_ts = events[0]
+        buttons.append(types.InlineKeyboardButton(text="◀️ السابق", callback_data=f"ev:p:{first_ts}:{first_id}"))
+    if has_next:
+        last_id, _, last_ts = events[-1]
+        buttons.append(types.InlineKeyboardButton(text="التالي ▶️", callback_data=f"ev:n:{last_ts}:{last_id}"))
+    markup = types.InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+    return text, markup
+
+async def build_events_caption(app, now_ts: int, granularity: int = 1):
+    """نص الصفحة الأولى من الأحداث (للرسائل الحية)."""
+    page = await build_events_page(app, now_ts, granularity=granularity)
+    return page[0] if page else None
+
+# 🟢 النص نفسه يصلح لكل الطلبات في نفس الثانية، فنبنيه مرة واحدة (single-flight)
+# ونحتفظ به في app.render_cache حتى تتغير الثانية أو يتغير المحتوى.
+async def render_once(app, key, now_ts: int, builder):
+    cache_key = (key, now_ts)
+    if cache_key in app.render_cache:
+        return app.render_cache[cache_key]
+
+    future = app.render_inflight.get(cache_key)
+    if future is None:
+        future = asyncio.ensure_future(builder(now_ts))
+        app.render_inflight[cache_key] = future
+        future.add_done_callback(lambda f: store_render(app, cache_key, f))
+    # shield: إلغاء أحد المنتظرين لا يلغي البناء على البقية
+    return await asyncio.shield(future)
+
+def store_render(app, cache_key, future):
+    app.render_inflight.pop(cache_key, None)
+    if future.cancelled() or future.exception() is not None:
+        return
+    key, now_ts = cache_key
+    for stale in [k for k in app.render_cache if k[0] == key and k[1] < now_ts]:
+        del app.render_cache[stale]
+    app.render_cache[cache_key] = future.result()
+
+# 🟢 اختياري: عند تكرار نفس الطلب في نفس المجموعة خلال reply_burst_window ثانية
+# نرد مرة واحدة على آخر رسالة بدلاً من إرسال نفس الصورة عدة مرات (0 = معطل).
+async def reply_coalesced(app, message: types.Message, key: str, send):
+    window = app.config.reply_burst_window
+    if window <= 0:
+        await send(message)
+        return
+
+    slot = (message.chat.id, key)
+    first = slot not in app.burst_pending
+    app.burst_pending[slot] = message
+    if not first:
+        return
+    try:
+        await asyncio.sleep(window)
+    finally:
+        # إلغاء المعالج أثناء الانتظار يجب أن يحرر الخانة وإلا تنتظر الطلبات التالية رداً لن يأتي
+        latest = app.burst_pending.pop(slot)
+    await send(latest)
+
+# --- Inline Mode ---
+
+# 🟢 "@bot البنر" من أي محادثة (يجب تفعيل inline mode من BotFather).
+# النتائج تُبنى مرة واحدة لكل خطوة عرض، و cache_time يساوي الوقت حتى يتغير النص
+# فتتولى خوادم Telegram الاستعلامات المتكررة.
+inline_keywords = {
+    'banner': ('banner', 'البنر', 'التبنر', 'بنر'),
+    'abyss': ('abyss', 'spiral_abyss', 'الابيس', 'ابيس'),
+    'stygian': ('stygian', 'ستيجيان'),
+    'theater': ('theater', 'المسرح', 'مسرح'),
+    'events': ('events', 'event', 'الاحداث', 'احداث'),
+}
+
+async def build_inline_results(app, now_ts: int):
+    """يرجع (valid_until, [(section, result), ...]) لكل الأقسام والأحداث."""
+    granularity = app.config.inline_granularity
+    results, deadlines = [], []
+    for section, arabic_title in arabic_section_titles.items():
+        row = await app.cache.get('section', section)
+        if not row:
+            continue
+        deadlines += [end_ts for _, end_ts in row[4]]
+        text, file_id = await build_section_caption(app, section, now_ts, granularity)
+        if file_id:
+            result = types.InlineQueryResultCachedPhoto(
+                id=section, photo_file_id=file_id, title=row[1] or arabic_title,
+                caption=text, parse_mode="Markdown"
+            )
+        else:
+            result = types.InlineQueryResultArticle(
+                id=section, title=row[1] or arabic_title, description=row[2] or None,
+                input_message_content=types.InputTextMessageContent(message_text=text, parse_mode="Markdown")
+            )
+        results.append((section, result))
+
+    events, _, _ = await app.cache.get('events')
+    if events:
+        deadlines += [end_ts for _, _, end_ts in events]
+        text = await build_events_caption(app, now_ts, granularity)
+        results.append(('events', types.InlineQueryResultArticle(
+            id='events', title="📌 الأحداث الحالية", description=f"{len(events)} حدث",
+            input_message_content=types.InputTextMessageContent(message_text=text, parse_mode="Markdown")
+        )))
+
+    # بدون مواعيد لا يتغير النص، لكن valid_until يصير cache_time لدى Telegram الذي لا نستطيع
+    # إبطاله عند نشر محتوى جديد: نبقيه قصيراً
+    valid_until = next_text_change(deadlines, now_ts, granularity) or now_ts + granularity
+    return valid_until, results
+
+# --- Countdown Cards (optional) ---
+
+# 🟢 card_images: الرد على الأقسام ببطاقة مرسومة (صورة القسم + العنوان + العد التنازلي
+# بالدقائق) بدلاً من الصورة الثابتة. كل بطاقة تُرسم وتُرفع مرة واحدة ثم يُعاد استخدام file_id.
+CARD_GRANULARITY = 60
+
+async def card_file_id(app, section: str, card_key: str):
+    file_id = app.card_file_ids.get((section, card_key))
+    if file_id is None:
+        row = await app.db.fetchone("SELECT file_id FROM card_cache WHERE section = ? AND card_key = ?", (section, card_key))
+        if not row:
+            return None
+        file_id = row[0]
+    remember_card(app, section, card_key, file_id)
+    return file_id
+
+def remember_card(app, section: str, card_key: str, file_id: str):
+    app.card_file_ids[(section, card_key)] = file_id
+    app.card_file_ids.move_to_end((section, card_key))
+    while len(app.card_file_ids) > 512:
+        app.card_file_ids.popitem(last=False)
+
+async def send_section_card(app, message: types.Message, section_key: str):
+    card_renderer = app.card_renderer
+    now_ts = int(app.clock.time())
+    row = await app.cache.get('section', section_key)
+    caption = await build_section_caption(app, section_key, now_ts, CARD_GRANULARITY)
+    if not row or not caption:
+        await message.reply(f"لا يوجد محتوى مضاف لقسم {section_key}.")
+        return
+
+    _, title, name, art_file_id, deadlines = row
+    labels = await app.region_labels(app.config.game)
+    rows = [(labels.get(server, server), time_left_str(end_ts, now_ts, CARD_GRANULARITY)) for server, end_ts in deadlines]
+    title = title or arabic_section_titles.get(section_key, section_key)
+    subtitle = name if section_key == 'banner' else ""
+    # البصمة تتغير فقط عندما يتغير ما يظهر في البطاقة (مرة في الدقيقة على الأكثر)
+    card_key = hashlib.sha1(repr((art_file_id, title, subtitle, rows)).encode()).hexdigest()[:20]
+    slot = (section_key, card_key)
+
+    file_id = await card_file_id(app, *slot)
+    if file_id is None and slot in app.card_inflight:
+        # نفس البطاقة قيد الرفع لمحادثة أخرى: ننتظر file_id بدلاً من رفعها مرة ثانية
+        file_id = await asyncio.shield(app.card_inflight[slot])
+    if file_id:
+        await message.reply_photo(photo=file_id, caption=caption[0], parse_mode="Markdown")
+        return
+
+    loop = asyncio.get_running_loop()
+    future = app.card_inflight[slot] = loop.create_future()
+    try:
+        if art_file_id and not card_renderer.has_art(art_file_id):
+            art = await app.bot.download(art_file_id)
+            await loop.run_in_executor(None, card_renderer.add_art, art_file_id, art.read())
+        image = await loop.run_in_executor(None, card_renderer.render, art_file_id, title, subtitle, rows)
+        sent = await message.reply_photo(
+            photo=types.BufferedInputFile(image, filename=f"{section_key}.jpg"),
+            caption=caption[0], parse_mode="Markdown"
+        )
+        file_id = sent.photo[-1].file_id
+
+        def save_card(conn):
+            conn.execute("""
+                INSERT OR REPLACE INTO card_cache (section, card_key, file_id, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (section_key, card_key, file_id, now_ts))
+            # البطاقات القديمة لن تُطلب مجدداً (تغيّر الوقت المعروض فيها)
+            conn.execute("DELETE FROM card_cache WHERE created_at < ?", (now_ts - 86400,))
+
+        await app.db.transaction(save_card)
+        remember_card(app, section_key, card_key, file_id)
+        app.metrics.inc("cards_rendered", section=section_key)
+    finally:
+        future.set_result(file_id)
+        app.card_inflight.pop(slot, None)
@@ -0,0 +1,50 @@
+"""تجهيز القاعدة عند التشغيل: الترحيلات والبيانات الافتراضية.
+
+التحقق قراءة واحدة سريعة؛ الكتابة (الترحيلات، VACUUM، البيانات الافتراضية)
+لا تحدث إلا عند تغيّر نسخة المخطط أو على قاعدة جديدة.
+"""
+import logging
+import time
+
+from .migrations import SCHEMA_VERSION, apply_migrations
+
+default_regions = [
+    ('genshin', 'asia', 8, 'آسيا', 1), # UTC+8
+    ('genshin', 'europe', 1, 'أوروبا', 2), # UTC+1
+    ('genshin', 'america', -5, 'أمريكا', 3), # UTC-5
+]
+
+def setup_database(conn, config):
+    apply_migrations(conn)
+
+    # Populate default admins and server offsets
+    conn.execute("INSERT OR IGNORE INTO admins (user_id) VALUES (?)", (config.owner_id,))
+    conn.executemany("INSERT OR IGNORE INTO server_offsets (game, server, offset_hours, label, position) VALUES (?, ?, ?, ?, ?)", default_regions)
+    # TARGET_CHAT_ID يُشترك مرة واحدة فقط: بعدها /unsubscribe أو حظر البوت لا يُلغى عند إعادة التشغيل
+    if config.target_chat_id is not None and not conn.execute("SELECT 1 FROM meta WHERE key = 'target_chat_seeded'").fetchone():
+        conn.execute("INSERT OR IGNORE INTO subscriptions (chat_id, created_at) VALUES (?, ?)", (config.target_chat_id, int(time.time())))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('target_chat_seeded', ?)", (str(config.target_chat_id),))
+
+def schema_ready(conn, config) -> bool:
+    """True إذا كانت القاعدة على آخر نسخة وفيها البيانات الافتراضية (لا حاجة لأي كتابة)."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        return False
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return False
+    if not conn.execute("SELECT 1 FROM admins WHERE user_id = ?", (config.owner_id,)).fetchone():
+        return False
+    if not conn.execute("SELECT 1 FROM server_offsets LIMIT 1").fetchone():
+        return False
+    if config.target_chat_id is not None and not conn.execute("SELECT 1 FROM meta WHERE key = 'target_chat_seeded'").fetchone():
+        return False
+    return True
+
+def ensure_schema(db, config) -> bool:
+    """يرحّل القاعدة ويضيف البيانات الافتراضية عند الحاجة فقط؛ يرجع True إذا كتب شيئاً."""
+    if db.read_sync(lambda conn: schema_ready(conn, config)):
+        return False
+    # 🟢 المساحة المحررة (أرشفة، تنظيف) تعود للنظام تدريجياً عبر incremental_vacuum
+    if db.enable_incremental_vacuum():
+        logging.info("Database rebuilt with auto_vacuum=INCREMENTAL")
+    db.run_sync(lambda conn: setup_database(conn, config))
+    return True
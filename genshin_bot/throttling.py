@@ -0,0 +1,89 @@
+"""حماية البوت من تكرار الطلبات (throttling) لكل محادثة ولكل مستخدم.
+
+لكل مجموعة أوامر حد خاص (مثال: show=10/60 أي 10 طلبات كل 60 ثانية)،
+والحالة محفوظة في LRU محدود الحجم فلا تكبر الذاكرة مع عدد المحادثات.
+التحديثات الزائدة تُهمل بصمت (مع عدّها) حتى لا تستهلك حدود الإرسال العامة.
+"""
+import logging
+from collections import OrderedDict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+from .ratelimit import TokenBucket
+
+
+def parse_limits(spec: str) -> dict:
+    """"show=10/60,default=20/60" -> {"show": (rate, capacity), ...}"""
+    limits = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        group, _, limit = part.partition("=")
+        count, _, seconds = limit.partition("/")
+        try:
+            count, seconds = int(count), float(seconds or 60)
+        except ValueError:
+            raise ValueError(f"Invalid throttle limit: {part!r}")
+        limits[group.strip()] = (count / seconds, count)
+    return limits
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    def __init__(self, chat_limits: dict, user_limits: dict, groups: dict = None,
+                 is_exempt=None, metrics=None, max_entries: int = 10000):
+        self.chat_limits = chat_limits
+        self.user_limits = user_limits
+        # اسم دالة المعالج -> مجموعة الأوامر (الباقي في "default")
+        self.groups = groups or {}
+        # is_exempt(user_id): coroutine للمستخدمين المستثنين (المشرفين)
+        self.is_exempt = is_exempt
+        self.metrics = metrics
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self.dropped = 0
+
+    def _bucket(self, scope: str, key_id: int, group: str, limits: dict):
+        limit = limits.get(group, limits.get("default"))
+        if limit is None:
+            return None
+        key = (scope, key_id, group)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*limit)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def __call__(self, handler, event, data):
+        handler_object = data.get("handler")
+        group = self.groups.get(handler_object.callback.__name__ if handler_object else None, "default")
+        user = data.get("event_from_user")
+        chat = data.get("event_chat")
+
+        if user and self.is_exempt is not None and await self.is_exempt(user.id):
+            return await handler(event, data)
+
+        buckets = []
+        if chat:
+            buckets.append(("chat", self._bucket("chat", chat.id, group, self.chat_limits)))
+        if user:
+            buckets.append(("user", self._bucket("user", user.id, group, self.user_limits)))
+        buckets = [(scope, bucket) for scope, bucket in buckets if bucket is not None]
+
+        # نتحقق من كل الحدود قبل الخصم حتى لا يُخصم من حد بينما يرفض الآخر
+        for scope, bucket in buckets:
+            if bucket.delay() > 0:
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.inc("throttled_updates", group=group, scope=scope)
+                logging.debug(f"Throttled {group} update ({scope} {chat.id if scope == 'chat' else user.id})")
+                if isinstance(event, CallbackQuery):
+                    # بدون رد يبقى الزر في حالة تحميل عند المستخدم
+                    await event.answer("⏳ طلبات كثيرة، حاول بعد قليل.")
+                return None
+        for _, bucket in buckets:
+            bucket.try_acquire()
+        return await handler(event, data)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """ينشئ نسخة من البوت على قاعدة مؤقتة ويغلقها بعد الاختبار."""
+    from genshin_bot import Config, create_app
+
+    apps = []
+
+    def make(**overrides):
+        config = Config(bot_token="123:test", owner_id=1, db_path=str(tmp_path / "bot.db"), **overrides)
+        app = create_app(config)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        app.db.close()
@@ -0,0 +1,175 @@
+import asyncio
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from genshin_bot.alerts import ALERT_SCHEDULE_WINDOW, build_alert_schedule, deliver_chat_alerts, deliver_outbox, enqueue_due_alerts
+from genshin_bot.clock import Clock
+from genshin_bot.content import save_section
+
+NOW = 2_000_000_000
+HOUR = 3600
+
+
+def add_banner(app, end_ts, sent=()):
+    def write(conn):
+        save_section(conn, app.config.game, 'banner', 'بنر', 'شخصية', None, [("asia", end_ts)])
+        content_id = conn.execute("SELECT id FROM content WHERE section = 'banner'").fetchone()[0]
+        conn.executemany("INSERT INTO sent_alerts (content_id, server, alert_type) VALUES (?, 'asia', ?)", [(content_id, t) for t in sent])
+        conn.execute("INSERT OR IGNORE INTO subscriptions (chat_id, created_at) VALUES (-100, 0)")
+        return content_id
+    return app.db.run_sync(write)
+
+
+def outbox_texts(app):
+    return [row[0] for row in app.db.read_sync(lambda conn: conn.execute("SELECT text FROM alert_outbox ORDER BY id").fetchall())]
+
+
+def test_overdue_thresholds_collapse_to_the_smallest(make_app):
+    app = make_app(alert_thresholds=[24 * HOUR, HOUR])
+    end_ts = NOW + HOUR // 2
+    content_id = add_banner(app, end_ts)
+
+    # تنبيها اليوم والساعة فات وقتهما معاً: يبقى تنبيه الساعة فقط ثم الانتهاء
+    heap = asyncio.run(build_alert_schedule(app, NOW))
+    assert sorted(heap) == [(end_ts - HOUR, content_id, "asia", HOUR), (end_ts, content_id, "asia", 0)]
+
+
+def test_sent_smaller_threshold_makes_larger_obsolete(make_app):
+    app = make_app(alert_thresholds=[24 * HOUR, HOUR])
+    end_ts = NOW + HOUR // 2
+    content_id = add_banner(app, end_ts, sent=["1_hour_remaining"])
+
+    heap = asyncio.run(build_alert_schedule(app, NOW))
+    assert heap == [(end_ts, content_id, "asia", 0)]
+
+
+def test_rebuild_at_horizon_does_not_resend(make_app):
+    app = make_app()
+    end_ts = NOW + ALERT_SCHEDULE_WINDOW + HOUR // 2
+    content_id = add_banner(app, end_ts)
+
+    async def main():
+        # النافذة الأولى: تنبيه الساعة فقط، والانتهاء بعد نهايتها
+        heap = await build_alert_schedule(app, NOW)
+        assert heap == [(end_ts - HOUR, content_id, "asia", HOUR)]
+        await enqueue_due_alerts(app, heap, end_ts - HOUR)
+
+        # إعادة البناء عند نهاية النافذة (وتكرار التنبيه نفسه) لا يرسل تنبيه الساعة مجدداً
+        heap = await build_alert_schedule(app, app.alert_schedule_horizon)
+        assert heap == [(end_ts, content_id, "asia", 0)]
+        await enqueue_due_alerts(app, [(end_ts - HOUR, content_id, "asia", HOUR)], end_ts - HOUR)
+        await enqueue_due_alerts(app, heap, end_ts)
+        assert await build_alert_schedule(app, end_ts) == []
+
+    asyncio.run(main())
+    texts = outbox_texts(app)
+    assert len(texts) == 2
+    assert "تنبيه الإنتهاء" in texts[0] and "انتهى المحتوى" in texts[1]
+
+
+# --- Outbox Delivery ---
+
+class FrozenClock(Clock):
+    def time(self) -> float:
+        return NOW
+
+
+def stub_bot(app, fail=None):
+    """يستبدل إرسال Telegram بقائمة؛ fail(text) يرجع استثناءً لرفض الرسالة."""
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        error = fail(text) if fail else None
+        if error:
+            raise error
+        sent.append((chat_id, text))
+
+    async def acquire(chat_id):
+        pass
+
+    app.clock = FrozenClock()
+    app.bot.send_message = send_message
+    app.send_limiter.acquire = acquire
+    return sent
+
+
+def queue_alerts(app, texts, chat_id=-100):
+    app.db.run_sync(lambda conn: conn.executemany(
+        "INSERT INTO alert_outbox (chat_id, text, created_at, next_attempt_at) VALUES (?, ?, ?, ?)",
+        [(chat_id, text, NOW, NOW) for text in texts]
+    ))
+
+
+def outbox_rows(app):
+    return app.db.read_sync(lambda conn: conn.execute("SELECT text, next_attempt_at FROM alert_outbox ORDER BY id").fetchall())
+
+
+def chat_rows(app):
+    return app.db.read_sync(lambda conn: conn.execute("SELECT id, text, attempts FROM alert_outbox ORDER BY id").fetchall())
+
+
+def test_alerts_for_one_chat_are_coalesced(make_app):
+    app = make_app()
+    sent = stub_bot(app)
+    queue_alerts(app, ["أ", "ب", "ج"])
+
+    asyncio.run(deliver_chat_alerts(app, -100, chat_rows(app)))
+    assert sent == [(-100, "أ\n\nب\n\nج")]
+    assert outbox_rows(app) == []
+
+
+def test_retry_after_postpones_delivery(make_app):
+    app = make_app()
+    sent = stub_bot(app, fail=lambda text: TelegramRetryAfter(SendMessage(chat_id=-100, text=text), "Flood control", 42))
+    queue_alerts(app, ["أ", "ب"])
+
+    asyncio.run(deliver_chat_alerts(app, -100, chat_rows(app)))
+    assert sent == []
+    assert outbox_rows(app) == [("أ", NOW + 42), ("ب", NOW + 42)]
+
+
+def test_bad_request_drops_only_the_broken_alert(make_app):
+    app = make_app()
+
+    def fail(text):
+        if "*" in text:
+            return TelegramBadRequest(SendMessage(chat_id=-100, text=text), "Bad Request: can't parse entities")
+    sent = stub_bot(app, fail)
+    queue_alerts(app, ["أ", "*ب", "ج"])
+
+    asyncio.run(deliver_chat_alerts(app, -100, chat_rows(app)))
+    assert sent == [(-100, "أ"), (-100, "ج")]
+    assert outbox_rows(app) == []
+    assert app.metrics.counters[("alerts_dropped", ())] == 1
+
+
+def test_claimed_rows_are_not_sent_by_a_second_worker(make_app):
+    app = make_app()
+    sent = stub_bot(app)
+    send_message, release = app.bot.send_message, asyncio.Event()
+
+    async def slow_send(chat_id, text, **kwargs):
+        await release.wait()
+        await send_message(chat_id, text, **kwargs)
+
+    app.bot.send_message = slow_send
+    queue_alerts(app, ["أ"])
+
+    async def main():
+        first = asyncio.ensure_future(deliver_outbox(app))
+        # العامل الأول حجز الصف وينتظر Telegram؛ الثاني لا يجد ما يرسله
+        while outbox_rows(app)[0][1] == NOW:
+            await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(deliver_outbox(app))
+        await asyncio.sleep(0.1)
+        release.set()
+        while outbox_rows(app):
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        for task in (first, second):
+            task.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+
+    asyncio.run(main())
+    assert sent == [(-100, "أ")]
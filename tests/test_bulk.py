@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from genshin_bot import bulk
+from genshin_bot.content import apply_import, export_content, prepare_import
+
+SERVERS = ["asia", "europe", "america"]
+
+DOC = {
+    "sections": [
+        {
+            "section": "banner", "title": "بنرات 5.8", "name": "سيتلالي + اينيفيا", "image_file_id": "file-1",
+            "times": {"asia": "2030-01-01 18:00:00", "europe": "2030-01-01 18:00:00", "america": "2030-01-01 18:00:00"},
+        },
+        {
+            "section": "abyss", "title": "أبس 5.8", "name": "", "image_file_id": None,
+            "times": {"asia": "2030-01-16 04:00:00", "europe": "2030-01-16 04:00:00", "america": "2030-01-16 04:00:00"},
+        },
+    ],
+    "events": [{"name": "حدث جديد", "time": "2030-02-01 12:30:00"}],
+}
+
+
+def import_doc(app, doc):
+    async def main():
+        sections, events, errors = await prepare_import(app, doc)
+        assert errors == []
+        await app.db.transaction(lambda conn: apply_import(conn, app.config.game, sections, events))
+        return await export_content(app)
+    return asyncio.run(main())
+
+
+def test_export_round_trips_through_json_and_csv(make_app):
+    app = make_app()
+    exported = import_doc(app, DOC)
+    assert exported == DOC
+
+    assert bulk.parse_json(bulk.to_json(exported)) == DOC
+    assert bulk.parse_document(bulk.to_csv(exported, SERVERS), "content.csv") == DOC
+
+
+def test_reimporting_an_export_updates_in_place(make_app):
+    app = make_app()
+    exported = import_doc(app, DOC)
+    assert import_doc(app, bulk.parse_json(bulk.to_json(exported))) == DOC
+
+    counts = asyncio.run(app.db.fetchall("SELECT section, COUNT(*) FROM content GROUP BY section ORDER BY section"))
+    assert counts == [("abyss", 1), ("banner", 1), ("events", 1)]
+
+
+def test_parse_lines_matches_server_order():
+    doc = bulk.parse_lines(
+        "banner ; بنر ; شخصية ; 2030-01-01 18:00:00 ; 2030-01-02 18:00:00 ; 2030-01-03 18:00:00\n"
+        "\n"
+        "events ; حدث ; 2030-02-01 12:30:00\n",
+        SERVERS,
+    )
+    assert doc["sections"][0]["times"] == {"asia": "2030-01-01 18:00:00", "europe": "2030-01-02 18:00:00", "america": "2030-01-03 18:00:00"}
+    assert doc["events"] == [{"name": "حدث", "time": "2030-02-01 12:30:00"}]
+
+
+@pytest.mark.parametrize("parse, data", [
+    (bulk.parse_json, b"{not json"),
+    (bulk.parse_json, b'"text"'),
+    (bulk.parse_json, b'{"sections": {}}'),
+    (bulk.parse_json, b"[1, 2]"),
+    (bulk.parse_json, b"\xff\xfe"),
+    (bulk.parse_csv, b"title,name\nx,y\n"),
+    (bulk.parse_csv, b""),
+    (lambda data: bulk.parse_lines(data.decode(), SERVERS), "banner ; بنر ; شخصية ; 2030-01-01 18:00:00".encode()),
+    (lambda data: bulk.parse_lines(data.decode(), SERVERS), "events ; حدث".encode()),
+])
+def test_malformed_documents_are_rejected(parse, data):
+    with pytest.raises(ValueError):
+        parse(data)
+
+
+def test_invalid_items_are_reported_and_nothing_is_prepared(make_app):
+    app = make_app()
+    times = DOC["sections"][0]["times"]
+    doc = {
+        "sections": [
+            {"section": "unknown", "times": times},
+            {"section": "banner", "times": {**times, "mars": "2030-01-01 00:00:00"}},
+            {"section": "abyss", "times": {**times, "europe": "2030-13-01 00:00:00"}},
+            {"section": "theater", "times": {"asia": times["asia"]}},
+            "not an object",
+        ],
+        "events": [{"name": "", "time": "2030-01-01 00:00:00"}, {"name": "حدث", "time": "غداً"}],
+    }
+    sections, events, errors = asyncio.run(prepare_import(app, doc))
+    assert sections == [] and events == []
+    assert len(errors) == 7
+
+
+def test_duplicate_sections_are_rejected(make_app):
+    app = make_app()
+    doc = {"sections": [DOC["sections"][0], DOC["sections"][0]], "events": []}
+    sections, _, errors = asyncio.run(prepare_import(app, doc))
+    assert len(sections) == 1
+    assert len(errors) == 1
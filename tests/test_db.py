@@ -0,0 +1,83 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from genshin_bot.db import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "test.db"), readers=2)
+    db.run_sync(lambda conn: conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)"))
+    yield db
+    db.close()
+
+
+def record_batches(db, monkeypatch):
+    sizes = []
+    commit_batch = db._commit_batch
+
+    def wrapper(batch):
+        sizes.append(len(batch))
+        return commit_batch(batch)
+
+    monkeypatch.setattr(db, "_commit_batch", wrapper)
+    return sizes
+
+
+def test_concurrent_writes_share_one_commit(db, monkeypatch):
+    sizes = record_batches(db, monkeypatch)
+
+    async def main():
+        await asyncio.gather(*(db.execute("INSERT INTO items (name) VALUES (?)", (f"item-{i}",)) for i in range(5)))
+        return await db.fetchone("SELECT COUNT(*) FROM items")
+
+    assert asyncio.run(main()) == (5,)
+    assert sizes == [5]
+
+
+def test_failing_write_does_not_roll_back_its_batch(db, monkeypatch):
+    sizes = record_batches(db, monkeypatch)
+
+    def partial_then_fail(conn):
+        conn.execute("INSERT INTO items (name) VALUES ('partial')")
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            db.execute("INSERT INTO items (name) VALUES ('a')"),
+            db.transaction(partial_then_fail),
+            db.execute("INSERT INTO items (name) VALUES ('a')"),  # UNIQUE
+            db.execute("INSERT INTO items (name) VALUES ('b')"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert sizes == [4]
+    assert results[0].rowcount == 1
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], sqlite3.IntegrityError)
+    assert results[3].rowcount == 1
+    # عمليات العملية الفاشلة تُلغى داخل savepoint فقط
+    names = asyncio.run(db.fetchall("SELECT name FROM items ORDER BY name"))
+    assert names == [("a",), ("b",)]
+
+
+def test_transaction_returns_value_and_is_atomic(db):
+    def insert_two(conn):
+        conn.execute("INSERT INTO items (name) VALUES ('x')")
+        return conn.execute("INSERT INTO items (name) VALUES ('y')").lastrowid
+
+    def insert_then_conflict(conn):
+        conn.execute("INSERT INTO items (name) VALUES ('z')")
+        conn.execute("INSERT INTO items (name) VALUES ('x')")
+
+    async def main():
+        last_id = await db.transaction(insert_two)
+        with pytest.raises(sqlite3.IntegrityError):
+            await db.transaction(insert_then_conflict)
+        return last_id, await db.fetchall("SELECT id, name FROM items ORDER BY id")
+
+    last_id, rows = asyncio.run(main())
+    assert rows == [(1, "x"), (last_id, "y")]
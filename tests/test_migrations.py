@@ -0,0 +1,124 @@
+import asyncio
+import calendar
+import sqlite3
+from datetime import datetime
+
+from genshin_bot.alerts import drop_subscription
+from genshin_bot.migrations import SCHEMA_VERSION, apply_migrations
+
+# مخطط genshin_bot.db قبل الترحيلات (user_version = 0) والمواعيد نصية بتوقيت UTC
+BASELINE_SCHEMA = """
+CREATE TABLE admins (user_id INTEGER PRIMARY KEY);
+CREATE TABLE content (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    section TEXT,
+    title TEXT,
+    name TEXT,
+    end_time_asia TEXT,
+    end_time_europe TEXT,
+    end_time_america TEXT,
+    description TEXT,
+    image_file_id TEXT
+);
+CREATE TABLE server_offsets (server TEXT PRIMARY KEY, offset_hours INTEGER);
+CREATE TABLE sent_alerts (
+    content_id INTEGER,
+    server TEXT,
+    alert_type TEXT,
+    PRIMARY KEY (content_id, server, alert_type)
+);
+"""
+
+
+def epoch(text):
+    return calendar.timegm(datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timetuple())
+
+
+def make_baseline(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO admins (user_id) VALUES (1)")
+    conn.executemany("INSERT INTO server_offsets (server, offset_hours) VALUES (?, ?)", [("asia", 8), ("europe", 1), ("america", -5)])
+    conn.execute("""
+        INSERT INTO content (id, section, title, name, end_time_asia, end_time_europe, end_time_america, image_file_id)
+        VALUES (1, 'banner', 'بنر 5.8', 'سيتلالي', '2025-10-20 18:00:00', '2025-10-21 01:00:00', '2025-10-21 07:00:00', 'file-1')
+    """)
+    # الأحداث في المخطط القديم لها وقت آسيا فقط
+    conn.execute("INSERT INTO content (id, section, name, end_time_asia) VALUES (2, 'events', 'حدث', '2025-10-25 07:30:00')")
+    conn.executemany("INSERT INTO sent_alerts (content_id, server, alert_type) VALUES (?, ?, ?)", [
+        (1, "asia", "1_hour_remaining"), (1, "europe", "expired"), (2, "asia", "1_hour_remaining"),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def migrate(path):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("BEGIN")
+    apply_migrations(conn)
+    conn.execute("COMMIT")
+    return conn
+
+
+def test_baseline_database_migrates_to_latest_version(tmp_path):
+    path = str(tmp_path / "genshin_bot.db")
+    make_baseline(path)
+    conn = migrate(path)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("SELECT id, game, section, title, name, image_file_id FROM content ORDER BY id").fetchall() == [
+        (1, "genshin", "banner", "بنر 5.8", "سيتلالي", "file-1"),
+        (2, "genshin", "events", None, "حدث", None),
+    ]
+    assert conn.execute("SELECT content_id, game, region, deadline FROM content_deadlines ORDER BY content_id, region").fetchall() == [
+        (1, "genshin", "america", epoch("2025-10-21 07:00:00")),
+        (1, "genshin", "asia", epoch("2025-10-20 18:00:00")),
+        (1, "genshin", "europe", epoch("2025-10-21 01:00:00")),
+        (2, "genshin", "asia", epoch("2025-10-25 07:30:00")),
+    ]
+    assert conn.execute("SELECT content_id, server, alert_type FROM sent_alerts ORDER BY content_id, server").fetchall() == [
+        (1, "asia", "1_hour_remaining"), (1, "europe", "expired"), (2, "asia", "1_hour_remaining"),
+    ]
+    assert conn.execute("SELECT server, offset_hours, label, position FROM server_offsets WHERE game = 'genshin' ORDER BY position").fetchall() == [
+        ("asia", 8, "آسيا", 1), ("europe", 1, "أوروبا", 2), ("america", -5, "أمريكا", 3),
+    ]
+    assert conn.execute("SELECT user_id FROM admins").fetchall() == [(1,)]
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    conn.close()
+
+
+def test_migrations_are_not_reapplied(tmp_path):
+    path = str(tmp_path / "genshin_bot.db")
+    make_baseline(path)
+    migrate(path).close()
+    conn = migrate(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM content_deadlines").fetchone()[0] == 4
+    conn.close()
+
+
+def test_create_app_upgrades_baseline_file_in_place(tmp_path, make_app):
+    make_baseline(str(tmp_path / "bot.db"))
+    app = make_app(target_chat_id=-100)
+
+    def read(conn):
+        return (
+            conn.execute("PRAGMA user_version").fetchone()[0],
+            conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM sent_alerts").fetchone()[0],
+            conn.execute("SELECT deadline FROM content_deadlines WHERE content_id = 1 AND region = 'asia'").fetchone()[0],
+            conn.execute("SELECT chat_id FROM subscriptions").fetchall(),
+        )
+
+    # قبل السلسلة كانت التنبيهات تذهب إلى TARGET_CHAT_ID: يبقى مشتركاً بعد الترقية
+    assert app.db.read_sync(read) == (SCHEMA_VERSION, 2, 3, epoch("2025-10-20 18:00:00"), [(-100,)])
+
+
+def test_restart_after_unsubscribe_does_not_resubscribe(tmp_path, make_app):
+    make_baseline(str(tmp_path / "bot.db"))
+    app = make_app(target_chat_id=-100)
+    asyncio.run(drop_subscription(app, -100))  # /unsubscribe
+    app.db.close()
+
+    app = make_app(target_chat_id=-100)
+    assert app.db.read_sync(lambda conn: conn.execute("SELECT chat_id FROM subscriptions").fetchall()) == []